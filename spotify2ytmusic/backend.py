@@ -5,20 +5,39 @@ import json
 import sys
 import os
 import time
-import re
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 
 from ytmusicapi import YTMusic
-from typing import Optional, Union, Iterator, Dict, List
-from collections import namedtuple
+from typing import Optional, Iterable, Iterator, Dict, List, Tuple, Union
+from collections import deque, namedtuple
 from dataclasses import dataclass, field
 
+from .biblioteca import BibliotecaSpotify, abrir_biblioteca, carregar_biblioteca
+from .cache import CacheAlbuns, CacheBusca, normalizar_texto
+from .correspondencia import (
+    LIMITE_PADRAO,
+    EstrategiaBusca,
+    chaves_faixa,
+    duracao_segundos,
+    melhor_correspondencia,
+    pontuar,
+)
+from .diario import DiarioMigracao, RegistroFalhas
+from .limitador import CircuitoAberto, LimitadorAdaptativo, YTMusicLimitado
 
-SongInfo = namedtuple("SongInfo", ["title", "artist", "album"])
+SongInfo = namedtuple(
+    "SongInfo", ["title", "artist", "album", "isrc", "duration_ms"], defaults=(None, None)
+)
 
 
-def obter_ytmusic() -> YTMusic:
+def obter_ytmusic(intervalo_minimo: Optional[float] = None) -> YTMusic:
     """
     Obtém uma instância autenticada do YTMusic usando 'oauth.json'.
+
+    Todas as chamadas passam por um limitador de taxa adaptativo (com
+    retentativa em 429/5xx); `intervalo_minimo` define o menor intervalo,
+    em segundos, entre requisições.
     """
     if not os.path.exists("oauth.json"):
         print("ERRO: O arquivo 'oauth.json' não existe no diretório atual.")
@@ -26,7 +45,10 @@ def obter_ytmusic() -> YTMusic:
         sys.exit(1)
 
     try:
-        return YTMusic("oauth.json")
+        return YTMusicLimitado(
+            YTMusic("oauth.json"),
+            LimitadorAdaptativo.para_intervalo(intervalo_minimo),
+        )
     except json.decoder.JSONDecodeError as e:
         print(f"ERRO: Problema ao decodificar JSON ao iniciar YTMusic: {e}")
         print("      Geralmente indica problema no 'oauth.json'.")
@@ -35,39 +57,41 @@ def obter_ytmusic() -> YTMusic:
 
 
 def _ytmusic_criar_playlist(
-    yt: YTMusic, title: str, description: str, privacy_status: str = "PRIVATE"
+    yt: YTMusic,
+    title: str,
+    description: str,
+    privacy_status: str = "PRIVATE",
+    video_ids: Optional[List[str]] = None,
+    indice: Optional["IndicePlaylistsYT"] = None,
 ) -> str:
-    """Wrapper de criação de playlist com retentativa exponencial."""
-    def _create(
-        yt: YTMusic, title: str, description: str, privacy_status: str
-    ) -> Union[str, dict]:
-        exception_sleep = 5
-        for _ in range(10):
-            try:
-                pid = yt.create_playlist(
-                    title=title, description=description, privacy_status=privacy_status
-                )
-                return pid
-            except Exception as e:
-                print(
-                    f"ERRO: (Tentando novamente create_playlist: {title}) {e} em {exception_sleep} s"
-                )
-                time.sleep(exception_sleep)
-                exception_sleep *= 2
-        return {"s2yt error": f'ERRO: Não foi possível criar a playlist "{title}"'}
-
-    pid = _create(yt, title, description, privacy_status)
+    """
+    Wrapper de criação de playlist (as retentativas ficam a cargo do limitador).
+    Se `video_ids` for informado, a playlist já é criada com essas faixas;
+    se `indice` for informado, a nova playlist é registrada nele.
+    """
+    try:
+        pid = yt.create_playlist(
+            title=title,
+            description=description,
+            privacy_status=privacy_status,
+            video_ids=video_ids,
+        )
+    except Exception as e:
+        pid = {"s2yt error": f'ERRO: Não foi possível criar a playlist "{title}": {e}'}
     if isinstance(pid, dict):
         print(f"ERRO: Falha ao criar playlist (nome: {title}): {pid}")
         sys.exit(1)
+    if indice is not None:
+        indice.registrar(title, pid)
 
-    time.sleep(1)  # evita erro de "missing playlist ID"
+    if not video_ids:
+        time.sleep(1)  # evita erro de "missing playlist ID" ao adicionar faixas depois
     return pid
 
 
 def carregar_playlists_json(filename: str = "playlists.json", encoding: str = "utf-8"):
     """Lê o arquivo `playlists.json` exportado do Spotify."""
-    return json.load(open(filename, "r", encoding=encoding))
+    return carregar_biblioteca(filename, encoding).dados
 
 
 def criar_playlist(pl_name: str, privacy_status: str = "PRIVATE") -> None:
@@ -82,15 +106,18 @@ def criar_playlist(pl_name: str, privacy_status: str = "PRIVATE") -> None:
 def iterar_albuns_curtidos_spotify(
     spotify_playlist_file: str = "playlists.json",
     spotify_encoding: str = "utf-8",
+    biblioteca: Optional[BibliotecaSpotify] = None,
 ) -> Iterator[SongInfo]:
-    """Itera faixas de álbuns curtidos no Spotify."""
-    spotify_pls = carregar_playlists_json(
-        spotify_playlist_file, spotify_encoding)
-    if "albums" not in spotify_pls:
-        return None
-    for album in [x["album"] for x in spotify_pls["albums"]]:
+    """
+    Itera faixas de álbuns curtidos no Spotify.
+    `biblioteca` pode ser qualquer objeto de `abrir_biblioteca` (inclusive em fluxo).
+    """
+    if biblioteca is None:
+        biblioteca = abrir_biblioteca(spotify_playlist_file, spotify_encoding)
+    for item in biblioteca.albuns:
+        album = item["album"]
         for track in album["tracks"]["items"]:
-            yield SongInfo(track["name"], track["artists"][0]["name"], album["name"])
+            yield _info_faixa(track, album["name"])
 
 
 def iterar_playlist_spotify(
@@ -98,59 +125,141 @@ def iterar_playlist_spotify(
     spotify_playlist_file: str = "playlists.json",
     spotify_encoding: str = "utf-8",
     reverse_playlist: bool = True,
+    biblioteca: Optional[BibliotecaSpotify] = None,
+    falhas: Optional[RegistroFalhas] = None,
+    destino: Optional[str] = None,
 ) -> Iterator[SongInfo]:
-    """Itera faixas de uma playlist específica (ou 'Liked Songs' se None)."""
-    spotify_pls = carregar_playlists_json(
-        spotify_playlist_file, spotify_encoding)
-
-    def _buscar_playlist(spotify_pls: Dict, src_pl_id: Union[str, None]) -> Dict:
-        for src_pl in spotify_pls["playlists"]:
-            if src_pl_id is None and str(src_pl.get("name")) == "Liked Songs":
-                return src_pl
-            if src_pl_id is not None and str(src_pl.get("id")) == src_pl_id:
-                return src_pl
-        raise ValueError(
-            f"Não foi possível encontrar a playlist do Spotify {src_pl_id}")
-
-    src_pl = _buscar_playlist(spotify_pls, src_pl_id)
+    """
+    Itera faixas de uma playlist específica (ou 'Liked Songs' se None).
+    Faixas malformadas são puladas e, se houver `falhas`, registradas
+    (com o `destino` da cópia, se informado).
+    """
+    if biblioteca is None:
+        biblioteca = abrir_biblioteca(spotify_playlist_file, spotify_encoding)
+
+    src_pl = biblioteca.buscar_playlist(src_pl_id)
     src_pl_name = src_pl["name"]
 
     print(f"== Playlist Spotify: {src_pl_name}")
 
-    pl_tracks = src_pl["tracks"]
-    if reverse_playlist:
-        pl_tracks = reversed(pl_tracks)
+    yield from _converter_faixas(
+        biblioteca.faixas(src_pl, reverso=reverse_playlist),
+        falhas,
+        src_pl_id or src_pl_name,
+        destino,
+    )
 
-    for src_track in pl_tracks:
+
+def _info_faixa(track: dict, album_name) -> SongInfo:
+    """`SongInfo` de uma faixa da API do Spotify, com ISRC e duração se houver."""
+    return SongInfo(
+        track["name"],
+        track["artists"][0]["name"],
+        album_name,
+        (track.get("external_ids") or {}).get("isrc"),
+        track.get("duration_ms"),
+    )
+
+
+def _converter_faixas(
+    itens: Iterable[dict],
+    falhas: Optional[RegistroFalhas] = None,
+    origem: Optional[str] = None,
+    destino: Optional[str] = None,
+) -> Iterator[SongInfo]:
+    """
+    Converte itens de faixa da API do Spotify em `SongInfo`. Com `falhas`,
+    itens malformados são registrados e pulados em vez de interromper; a
+    posição registrada é a mesma de `copiar_faixas` (entre as faixas
+    válidas), isto é, a da próxima faixa válida.
+    """
+    pos = 0
+    for src_track in itens:
         if src_track["track"] is None:
             print("AVISO: Faixa do Spotify malformada. Pulando.")
+            if falhas is not None:
+                falhas.registrar("malformada", origem, destino, pos,
+                                 erro="faixa sem dados ('track' nulo)")
             continue
         try:
-            src_album_name = src_track["track"]["album"]["name"]
-            src_track_artist = src_track["track"]["artists"][0]["name"]
-        except TypeError as e:
+            info = _info_faixa(src_track["track"], src_track["track"]["album"]["name"])
+        except (TypeError, KeyError, IndexError) as e:
             print(f"ERRO: Faixa do Spotify malformada. Track: {src_track!r}")
-            raise e
-        src_track_name = src_track["track"]["name"]
-        yield SongInfo(src_track_name, src_track_artist, src_album_name)
+            if falhas is None:
+                raise e
+            falhas.registrar(
+                "malformada", origem, destino, pos,
+                title=src_track["track"].get("name"), erro=repr(src_track),
+            )
+            continue
+        pos += 1
+        yield info
 
 
-def obter_id_playlist_por_nome(yt: YTMusic, title: str) -> Optional[str]:
-    """Obtém o ID de uma playlist no YTMusic pelo nome."""
-    try:
-        playlists = yt.get_library_playlists(limit=5000)
-    except KeyError as e:
-        print("=" * 60)
-        print(
-            f"Tentativa de localizar playlist '{title}' falhou com KeyError: {e}")
-        print("Bug do ytmusicapi. Atualize: `pip install --upgrade ytmusicapi`")
-        print("=" * 60)
-        raise
+def _chave_faixa(src_track: SongInfo) -> Tuple[str, str, str]:
+    """Chave (título, artista, álbum) normalizada, a mesma do cache de buscas."""
+    return (
+        normalizar_texto(src_track.title),
+        normalizar_texto(src_track.artist),
+        normalizar_texto(src_track.album),
+    )
 
-    for pl in playlists:
-        if pl["title"] == title:
-            return pl["playlistId"]
-    return None
+
+def _faixas_validas(itens: Iterable[dict]) -> Iterator[SongInfo]:
+    """Como `_converter_faixas`, mas pula itens malformados em silêncio."""
+    for item in itens:
+        try:
+            track = item["track"]
+            yield _info_faixa(track, track["album"]["name"])
+        except (TypeError, KeyError, IndexError):
+            continue
+
+
+class IndicePlaylistsYT:
+    """
+    Índice nome → ID das playlists da biblioteca do YTMusic. A listagem é
+    baixada uma única vez e atualizada quando criamos playlists.
+    """
+
+    def __init__(self, yt: YTMusic):
+        self._yt = yt
+        self._por_nome: Optional[Dict[str, str]] = None
+
+    def _carregar(self) -> Dict[str, str]:
+        if self._por_nome is None:
+            try:
+                playlists = self._yt.get_library_playlists(limit=5000)
+            except KeyError as e:
+                print("=" * 60)
+                print(
+                    f"Tentativa de listar as playlists do YTMusic falhou com KeyError: {e}")
+                print("Bug do ytmusicapi. Atualize: `pip install --upgrade ytmusicapi`")
+                print("=" * 60)
+                raise
+            self._por_nome = {}
+            for pl in playlists:
+                self._por_nome.setdefault(pl["title"], pl["playlistId"])
+        return self._por_nome
+
+    def obter(self, title: str) -> Optional[str]:
+        return self._carregar().get(title)
+
+    def registrar(self, title: str, playlist_id: str) -> None:
+        """Inclui no índice uma playlist recém-criada."""
+        if self._por_nome is not None:
+            self._por_nome.setdefault(title, playlist_id)
+
+
+def obter_id_playlist_por_nome(
+    yt: YTMusic, title: str, indice: Optional[IndicePlaylistsYT] = None
+) -> Optional[str]:
+    """
+    Obtém o ID de uma playlist no YTMusic pelo nome.
+    Passe o mesmo `indice` em chamadas repetidas para listar a biblioteca uma vez só.
+    """
+    if indice is None:
+        indice = IndicePlaylistsYT(yt)
+    return indice.obter(title)
 
 
 @dataclass
@@ -158,6 +267,27 @@ class DetalhesPesquisa:
     query: Optional[str] = field(default=None)
     songs: Optional[List[Dict]] = field(default=None)
     suggestions: Optional[List[str]] = field(default=None)
+    estrategia: Optional[str] = field(default=None)
+    pontuacao: Optional[float] = field(default=None)
+
+
+def estrategia_correspondencia(track: dict) -> str:
+    """
+    Como a faixa do YTMusic foi encontrada, a partir do próprio resultado:
+    faixas de `get_album` não têm `resultType`; as de `search` têm.
+    """
+    tipo = track.get("resultType")
+    return f"busca:{tipo}" if tipo else "album"
+
+
+def pontuar_correspondencia(src_track: SongInfo, track: dict) -> float:
+    """
+    Semelhança (0 a 1) entre a faixa do Spotify e a do YTMusic, com os pesos
+    de `correspondencia.pontuar` (título, artista, álbum e duração).
+    """
+    chaves = chaves_faixa(
+        src_track.title, src_track.artist, src_track.album, src_track.duration_ms)
+    return round(pontuar(chaves, track), 3)
 
 
 def buscar_musica(
@@ -167,28 +297,97 @@ def buscar_musica(
     album_name,
     yt_search_algo: int,
     details: Optional[DetalhesPesquisa] = None,
+    cache: Optional[CacheBusca] = None,
+    albuns: Optional[CacheAlbuns] = None,
+    estrategia: Optional[EstrategiaBusca] = None,
+    isrc: Optional[str] = None,
+    duration_ms: Optional[int] = None,
 ) -> dict:
-    """Localiza uma música no YTMusic (algoritmos 0/1/2)."""
-    albums = yt.search(query=f"{album_name} by {artist_name}", filter="albums")
-    for album in albums[:3]:
+    """
+    Localiza uma música no YTMusic (algoritmos 0/1/2).
+
+    Se `cache` for informado, o resultado é consultado/gravado nele
+    (exceto quando `details` é pedido, pois exige a busca completa).
+    `albuns` reaproveita buscas de álbum e `get_album` entre faixas;
+    `estrategia` ordena os caminhos de busca pelos acertos da execução.
+    Com `isrc`, a busca pelo ISRC é tentada primeiro; `duration_ms` entra
+    na pontuação dos candidatos.
+    """
+    if cache is not None and details is None:
+        track = cache.obter(track_name, artist_name,
+                            album_name, yt_search_algo)
+        if track is not None:
+            return track
+
+    track = _buscar_musica_online(
+        yt,
+        track_name,
+        artist_name,
+        album_name,
+        yt_search_algo,
+        details,
+        albuns if albuns is not None else CacheAlbuns(),
+        estrategia,
+        isrc,
+        duration_ms,
+    )
+    if cache is not None and track is not None:
+        cache.salvar(track_name, artist_name,
+                     album_name, yt_search_algo, track)
+    if details is not None and track is not None:
+        details.estrategia = estrategia_correspondencia(track)
+        details.pontuacao = pontuar_correspondencia(
+            SongInfo(track_name, artist_name, album_name, isrc, duration_ms), track)
+    return track
+
+
+class _ContadorRequisicoes:
+    """Repassa as chamadas ao `yt`, contando quantas foram feitas."""
+
+    def __init__(self, yt: YTMusic):
+        self.yt = yt
+        self.total = 0
+
+    def __getattr__(self, nome: str):
+        atributo = getattr(self.yt, nome)
+        if nome.startswith("_") or not callable(atributo):
+            return atributo
+
+        def chamada(*args, **kwargs):
+            self.total += 1
+            return atributo(*args, **kwargs)
+
+        return chamada
+
+
+def _buscar_no_album(
+    yt, track_name: str, artist_name: str, album_name, albuns: CacheAlbuns
+) -> Optional[dict]:
+    for browse_id in albuns.buscar_albuns(yt, album_name, artist_name)[:3]:
         try:
-            for track in yt.get_album(album["browseId"])["tracks"]:
+            for track in albuns.faixas_album(yt, browse_id):
                 if track["title"] == track_name:
                     return track
         except Exception as e:
             print(f"Não foi possível consultar o álbum ({e}), continuando…")
+    return None
 
-    query = f"{track_name} by {artist_name}"
-    if details:
-        details.query = query
-        details.suggestions = yt.get_search_suggestions(query=query)
-    songs = yt.search(query=query, filter="songs")
 
+def _escolher_musica(
+    songs: List[dict],
+    track_name: str,
+    artist_name: str,
+    album_name,
+    yt_search_algo: int,
+    duration_ms: Optional[int] = None,
+) -> Optional[dict]:
+    """Resultado de `search` aceito com confiança pelo algoritmo, ou None."""
+    chaves = chaves_faixa(track_name, artist_name, album_name, duration_ms)
     match yt_search_algo:
         case 0:
-            if details:
-                details.songs = songs
-            return songs[0]
+            if songs and pontuar(chaves, songs[0]) >= LIMITE_PADRAO:
+                return songs[0]
+            return None
         case 1:
             for song in songs:
                 if (
@@ -197,49 +396,382 @@ def buscar_musica(
                     and song["album"]["name"] == album_name
                 ):
                     return song
-            raise ValueError(
-                f"Não encontrei {track_name} de {artist_name} em {album_name}")
-        case 2:
-            for song in songs:
-                title_wo_brackets = re.sub(r"[\[(].*?[])]", "", song["title"])
-                if (
-                    (
-                        title_wo_brackets == track_name
-                        and song["album"]["name"] == album_name
-                    )
-                    or (title_wo_brackets == track_name)
-                    or (title_wo_brackets in track_name)
-                    or (track_name in title_wo_brackets)
-                ) and (
-                    song["artists"][0]["name"] == artist_name
-                    or artist_name in song["artists"][0]["name"]
-                ):
-                    return song
+            return None
+    return melhor_correspondencia(chaves, songs)[0]
+
+
+def _buscar_musica_online(
+    yt: YTMusic,
+    track_name: str,
+    artist_name: str,
+    album_name,
+    yt_search_algo: int,
+    details: Optional[DetalhesPesquisa],
+    albuns: CacheAlbuns,
+    estrategia: Optional[EstrategiaBusca] = None,
+    isrc: Optional[str] = None,
+    duration_ms: Optional[int] = None,
+) -> dict:
+    """
+    Executa a busca no YTMusic, sem cache de resultados.
+
+    Os caminhos ('isrc', 'album' e 'musica') são tentados na ordem dada
+    pela `estrategia` (nessa ordem, se omitida) até um resultado confiável;
+    o caminho 'isrc' só existe se a faixa tiver ISRC. Se nenhum for
+    confiável, vale o critério do algoritmo sobre os resultados de
+    `search` (o primeiro, nenhum, ou a busca de vídeos).
+    """
+    yt = _ContadorRequisicoes(yt)
+    query = f"{track_name} by {artist_name}"
+    chaves = chaves_faixa(track_name, artist_name, album_name, duration_ms)
+    songs: Optional[List[dict]] = None
+    track = None
+    try:
+        if details:
+            details.query = query
+            details.suggestions = yt.get_search_suggestions(query=query)
+        ordem = estrategia.ordem() if estrategia is not None else EstrategiaBusca.CAMINHOS
+        for caminho in ordem:
+            antes = yt.total
+            if caminho == "isrc":
+                if not isrc:
+                    continue
+                # A busca pelo ISRC costuma trazer só a gravação certa; a
+                # duração desempata entre versões com o mesmo nome.
+                track = _escolher_musica(
+                    yt.search(query=isrc, filter="songs"),
+                    track_name, artist_name, album_name,
+                    1 if yt_search_algo == 1 else 2,
+                    duration_ms,
+                )
+            elif caminho == "album":
+                track = _buscar_no_album(
+                    yt, track_name, artist_name, album_name, albuns)
             else:
-                track_name_l = track_name.lower()
-                first_song_title = songs[0]["title"].lower()
-                if (
-                    track_name_l not in first_song_title
-                    or songs[0]["artists"][0]["name"] != artist_name
-                ):
-                    print("Não encontrei em 'songs', pesquisando em 'videos'…")
-                    new_songs = yt.search(
-                        query=f"{track_name} by {artist_name}", filter="videos"
+                songs = yt.search(query=query, filter="songs")
+                if details:
+                    details.songs = songs
+                track = _escolher_musica(
+                    songs, track_name, artist_name, album_name,
+                    yt_search_algo, duration_ms)
+            if estrategia is not None:
+                estrategia.registrar(caminho, track is not None, yt.total - antes)
+            if track is not None:
+                return track
+
+        match yt_search_algo:
+            case 0:
+                track = songs[0]
+                return track
+            case 1:
+                raise ValueError(
+                    f"Não encontrei {track_name} de {artist_name} em {album_name}")
+            case 2:
+                print("Não encontrei em 'songs', pesquisando em 'videos'…")
+                videos = yt.search(query=query, filter="videos")
+                track, _ = melhor_correspondencia(chaves, videos)
+                if track is None:
+                    raise ValueError(
+                        f"Não encontrei {track_name} de {artist_name} em {album_name}"
                     )
-                    for new_song in new_songs:
-                        new_song_title = new_song["title"].lower()
-                        if (
-                            track_name_l in new_song_title
-                            and artist_name in new_song_title
-                        ) or (track_name_l in new_song_title):
-                            print("Vídeo correspondente encontrado.")
-                            return new_song
-                    else:
-                        raise ValueError(
-                            f"Não encontrei {track_name} de {artist_name} em {album_name}"
-                        )
-                else:
-                    return songs[0]
+                print("Vídeo correspondente encontrado.")
+                return track
+    finally:
+        if estrategia is not None:
+            estrategia.registrar_faixa(track is not None, yt.total)
+
+
+def _indexar_faixas_playlist(
+    tracks: List[dict],
+) -> Tuple[set, Dict[Tuple[str, str], dict]]:
+    """
+    Indexa as faixas de uma playlist do YTMusic por videoId e por
+    (título, primeiro artista) normalizados.
+    """
+    ids = set()
+    nomes: Dict[Tuple[str, str], dict] = {}
+    for track in tracks:
+        if not track.get("videoId"):
+            continue
+        ids.add(track["videoId"])
+        artistas = track.get("artists") or [{}]
+        chave = (
+            normalizar_texto(track.get("title")),
+            normalizar_texto(artistas[0].get("name")),
+        )
+        nomes.setdefault(chave, track)
+    return ids, nomes
+
+
+def _resolver_faixa(
+    yt: YTMusic,
+    src_track: SongInfo,
+    yt_search_algo: int,
+    cache: Optional[CacheBusca] = None,
+    albuns: Optional[CacheAlbuns] = None,
+    estrategia: Optional[EstrategiaBusca] = None,
+) -> Tuple[Optional[dict], Optional[Exception]]:
+    """Busca uma faixa, devolvendo (faixa, None) ou (None, exceção)."""
+    try:
+        return (
+            buscar_musica(
+                yt,
+                src_track.title,
+                src_track.artist,
+                src_track.album,
+                yt_search_algo,
+                cache=cache,
+                albuns=albuns,
+                estrategia=estrategia,
+                isrc=src_track.isrc,
+                duration_ms=src_track.duration_ms,
+            ),
+            None,
+        )
+    except Exception as e:
+        return None, e
+
+
+def _resolver_em_ordem(
+    yt: YTMusic,
+    itens: Iterator[Tuple[SongInfo, Union[dict, Exception, None]]],
+    yt_search_algo: int,
+    cache: Optional[CacheBusca] = None,
+    workers: int = 1,
+    albuns: Optional[CacheAlbuns] = None,
+    estrategia: Optional[EstrategiaBusca] = None,
+) -> Iterator[Tuple[SongInfo, Optional[dict], Optional[Exception]]]:
+    """
+    Resolve as faixas e as devolve na ordem original.
+
+    `itens` são pares (faixa, resultado já conhecido ou None); só as faixas
+    sem resultado conhecido são buscadas. Um resultado conhecido pode ser a
+    exceção de uma busca já feita. Com `workers` > 1, as buscas das
+    próximas faixas rodam em paralelo (no máximo `2 * workers` adiantadas)
+    enquanto as anteriores são consumidas.
+    """
+    def _resolver(src_track: SongInfo, conhecida: Union[dict, Exception, None]):
+        if isinstance(conhecida, Exception):
+            return None, conhecida
+        if conhecida is not None:
+            return conhecida, None
+        return _resolver_faixa(
+            yt, src_track, yt_search_algo, cache, albuns, estrategia)
+
+    if workers <= 1:
+        for src_track, conhecida in itens:
+            yield (src_track, *_resolver(src_track, conhecida))
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pendentes = deque()
+        for src_track, conhecida in itens:
+            pendentes.append(
+                (src_track, pool.submit(_resolver, src_track, conhecida)))
+            if len(pendentes) >= 2 * workers:
+                src, futuro = pendentes.popleft()
+                yield (src, *futuro.result())
+        while pendentes:
+            src, futuro = pendentes.popleft()
+            yield (src, *futuro.result())
+
+
+Resolucoes = Dict[Tuple[str, str, str], Union[dict, Exception]]
+
+
+def planejar_resolucoes(
+    yt: YTMusic,
+    fontes: Iterable[Iterable[SongInfo]],
+    yt_search_algo: int = 0,
+    cache: Optional[CacheBusca] = None,
+    workers: int = 1,
+    albuns: Optional[CacheAlbuns] = None,
+    estrategia: Optional[EstrategiaBusca] = None,
+) -> Resolucoes:
+    """
+    Etapa de planejamento: junta as faixas de todas as `fontes`, busca cada
+    (título, artista, álbum) distinto uma única vez e devolve o resultado
+    (ou a exceção) por `_chave_faixa`, para repassar a `copiar_faixas`.
+    """
+    unicas: Dict[Tuple[str, str, str], SongInfo] = {}
+    ocorrencias = 0
+    for faixas in fontes:
+        for src_track in faixas:
+            ocorrencias += 1
+            unicas.setdefault(_chave_faixa(src_track), src_track)
+    print(
+        f"Planejamento: {ocorrencias} faixas, {len(unicas)} distintas "
+        f"({ocorrencias - len(unicas)} buscas evitadas)."
+    )
+
+    resolucoes: Resolucoes = {}
+    for n, (src_track, dst_track, erro) in enumerate(
+        _resolver_em_ordem(
+            yt, ((src, None) for src in unicas.values()),
+            yt_search_algo, cache, workers, albuns, estrategia,
+        ),
+        1,
+    ):
+        if isinstance(erro, CircuitoAberto):
+            print(f"ERRO: {erro} Rode novamente mais tarde.")
+            raise erro
+        resolucoes[_chave_faixa(src_track)] = erro if erro is not None else dst_track
+        if n % 100 == 0:
+            print(f"  {n}/{len(unicas)} faixas resolvidas…")
+    return resolucoes
+
+
+# Diferença máxima de duração (s) entre faixas alinhadas de um álbum.
+DIFERENCA_MAXIMA_ALBUM = 10
+
+
+def _alinhar_album(
+    faixas_spotify: List[SongInfo], faixas_yt: List[dict]
+) -> Dict[int, dict]:
+    """
+    Alinha as faixas de um álbum do Spotify às de um álbum do YTMusic.
+    Os pares são escolhidos da maior pontuação para a menor (a mesma
+    posição desempata), para que uma faixa ausente no YTMusic não tome a
+    de uma vizinha de título parecido. Pares cujas durações (quando ambas
+    conhecidas) diferem mais que `DIFERENCA_MAXIMA_ALBUM` segundos são
+    descartados. Retorna posição no Spotify → faixa.
+    """
+    pares = []
+    for pos, src_track in enumerate(faixas_spotify):
+        chaves = chaves_faixa(
+            src_track.title, src_track.artist, src_track.album, src_track.duration_ms)
+        for j, track in enumerate(faixas_yt):
+            if not track.get("videoId"):
+                continue
+            segundos = duracao_segundos(track)
+            if (
+                chaves.duracao and segundos
+                and abs(chaves.duracao - segundos) > DIFERENCA_MAXIMA_ALBUM
+            ):
+                continue
+            pares.append((pontuar(chaves, track), j == pos, pos, j))
+    pares.sort(reverse=True)
+
+    alinhadas: Dict[int, dict] = {}
+    usadas = set()
+    for nota, _, pos, j in pares:
+        if nota < LIMITE_PADRAO:
+            break
+        if pos in alinhadas or j in usadas:
+            continue
+        alinhadas[pos] = faixas_yt[j]
+        usadas.add(j)
+    return alinhadas
+
+
+def resolver_albuns(
+    yt: YTMusic,
+    itens_albuns: Iterable[dict],
+    albuns: Optional[CacheAlbuns] = None,
+    workers: int = 1,
+    cobertura: float = 0.8,
+) -> Resolucoes:
+    """
+    Resolve álbuns curtidos do Spotify álbum a álbum: cada álbum é buscado
+    uma vez no YTMusic e a lista de faixas de até 3 resultados é alinhada à
+    do Spotify, parando no primeiro que cubra `cobertura` das faixas. As
+    requisições crescem com o número de álbuns, não de faixas.
+
+    Devolve as faixas alinhadas por `_chave_faixa`, para `copiar_faixas`;
+    as que ficarem de fora são buscadas uma a uma, como antes.
+    """
+    if albuns is None:
+        albuns = CacheAlbuns()
+
+    def _resolver_album(item: dict) -> Tuple[List[SongInfo], Dict[int, dict], int]:
+        album = item["album"]
+        faixas = [_info_faixa(track, album["name"])
+                  for track in album["tracks"]["items"]]
+        artistas = album.get("artists") or []
+        artista = artistas[0]["name"] if artistas else (faixas[0].artist if faixas else "")
+        contador = _ContadorRequisicoes(yt)
+        melhor: Dict[int, dict] = {}
+        try:
+            browse_ids = albuns.buscar_albuns(contador, album["name"], artista)[:3]
+        except CircuitoAberto:
+            raise
+        except Exception as e:
+            print(f"Não foi possível buscar o álbum '{album['name']}' ({e}), continuando…")
+            browse_ids = []
+        for browse_id in browse_ids:
+            try:
+                faixas_yt = albuns.faixas_album(contador, browse_id)
+            except CircuitoAberto:
+                raise
+            except Exception as e:
+                print(f"Não foi possível consultar o álbum ({e}), continuando…")
+                continue
+            alinhadas = _alinhar_album(faixas, faixas_yt)
+            if len(alinhadas) > len(melhor):
+                melhor = alinhadas
+            if len(melhor) >= cobertura * len(faixas):
+                break
+        return faixas, melhor, contador.total
+
+    def _resultados() -> Iterator[Tuple[List[SongInfo], Dict[int, dict], int]]:
+        # Como em `_resolver_em_ordem`: no máximo `2 * workers` álbuns adiantados,
+        # para não carregar todos os álbuns curtidos (`--stream-json`).
+        if workers <= 1:
+            for item in itens_albuns:
+                yield _resolver_album(item)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pendentes = deque()
+            for item in itens_albuns:
+                pendentes.append(pool.submit(_resolver_album, item))
+                if len(pendentes) >= 2 * workers:
+                    yield pendentes.popleft().result()
+            while pendentes:
+                yield pendentes.popleft().result()
+
+    resolucoes: Resolucoes = {}
+    total_albuns = total_faixas = encontrados = requisicoes = 0
+    for faixas, alinhadas, n in _resultados():
+        total_albuns += 1
+        total_faixas += len(faixas)
+        encontrados += bool(alinhadas)
+        requisicoes += n
+        for pos, track in alinhadas.items():
+            resolucoes.setdefault(_chave_faixa(faixas[pos]), track)
+    print(
+        f"Álbuns: {encontrados}/{total_albuns} encontrados no YTMusic, "
+        f"{len(resolucoes)}/{total_faixas} faixas alinhadas com {requisicoes} requisições."
+    )
+    return resolucoes
+
+
+def _adicionar_lote(yt: YTMusic, dst_pl_id: str, video_ids: List[str]) -> List[str]:
+    """
+    Adiciona `video_ids` à playlist em uma única chamada. Se o lote falhar
+    (após as retentativas do limitador), ele é dividido ao meio, mantendo a
+    ordem. Retorna os videoIds que não puderam ser adicionados; se o
+    disjuntor abrir, `CircuitoAberto` é repassada.
+    """
+    try:
+        ret = yt.add_playlist_items(
+            playlistId=dst_pl_id, videoIds=video_ids, duplicates=False
+        )
+        if isinstance(ret, dict) and ret.get("status", "STATUS_SUCCEEDED") != "STATUS_SUCCEEDED":
+            raise Exception(f"status {ret.get('status')}")
+        return []
+    except CircuitoAberto:
+        raise
+    except Exception as e:
+        print(
+            f"ERRO: add_playlist_items falhou ({dst_pl_id}, {len(video_ids)} faixas): {e}")
+
+    if len(video_ids) == 1:
+        print(f"ERRO: Não foi possível adicionar {video_ids[0]} à playlist.")
+        return list(video_ids)
+    meio = len(video_ids) // 2
+    return _adicionar_lote(yt, dst_pl_id, video_ids[:meio]) + _adicionar_lote(
+        yt, dst_pl_id, video_ids[meio:]
+    )
 
 
 def copiar_faixas(
@@ -250,36 +782,146 @@ def copiar_faixas(
     yt_search_algo: int = 0,
     *,
     yt: Optional[YTMusic] = None,
-):
-    """Copia faixas (curtir ou adicionar à playlist destino)."""
+    cache: Optional[CacheBusca] = None,
+    workers: int = 1,
+    tamanho_lote: int = 100,
+    criar_com_titulo: Optional[str] = None,
+    privacy_status: str = "PRIVATE",
+    diario: Optional[DiarioMigracao] = None,
+    origem: Optional[str] = None,
+    albuns: Optional[CacheAlbuns] = None,
+    indice: Optional[IndicePlaylistsYT] = None,
+    falhas: Optional[RegistroFalhas] = None,
+    resolucoes: Optional[Resolucoes] = None,
+    estrategia: Optional[EstrategiaBusca] = None,
+    # `get_playlist` de `dst_pl_id`, se já baixado.
+    playlist_destino: Optional[dict] = None,
+) -> Optional[str]:
+    """
+    Copia faixas (curtir ou adicionar à playlist destino), com buscas em
+    `workers` threads e escrita em lotes na ordem do Spotify, registrando o
+    progresso no `diario` e as faixas que falharem em `falhas`. Retorna o ID
+    da playlist destino.
+    """
     if yt is None:
-        yt = obter_ytmusic()
+        yt = obter_ytmusic(track_sleep)
+    elif not isinstance(yt, YTMusicLimitado):
+        yt = YTMusicLimitado(yt, LimitadorAdaptativo.para_intervalo(track_sleep))
+    if albuns is None:
+        albuns = CacheAlbuns(cache)
+    resumir_estrategia = estrategia is None
+    if estrategia is None:
+        estrategia = EstrategiaBusca()
+    if diario is not None and dry_run:
+        diario = None
+    if origem is None:
+        origem = dst_pl_id or criar_com_titulo or "Liked Songs"
+    destino = dst_pl_id
+    if destino is None and criar_com_titulo is not None:
+        destino = "+" + criar_com_titulo
 
+    para_playlist = dst_pl_id is not None or criar_com_titulo is not None
+    existentes_ids: set = set()
+    existentes_nomes: Dict[Tuple[str, str], dict] = {}
     if dst_pl_id is not None:
         try:
-            yt_pl = yt.get_playlist(playlistId=dst_pl_id)
+            yt_pl = playlist_destino or yt.get_playlist(playlistId=dst_pl_id, limit=None)
         except Exception as e:
             print(
                 f"ERRO: Não foi possível encontrar a playlist do YTMusic {dst_pl_id}: {e}")
             print("      Verifique o ID (ex.: 'PL_xxxxxxxxxxxxxxxxx').")
             sys.exit(1)
         print(f"== Playlist Youtube: {yt_pl['title']}")
+        existentes_ids, existentes_nomes = _indexar_faixas_playlist(
+            yt_pl.get("tracks") or []
+        )
+        if existentes_ids:
+            print(f"   ({len(existentes_ids)} faixas já presentes no destino)")
 
     tracks_added_set = set()
     duplicate_count = 0
     error_count = 0
+    present_count = 0
+    write_errors = 0
+    lote: List[str] = []
+    lote_pos: List[int] = []
+    lote_src: List[SongInfo] = []
+
+    def _registrar_falha(motivo, pos, src_track, erro, video_id=None):
+        if falhas is not None:
+            falhas.registrar(
+                motivo, origem, destino, pos,
+                src_track.title, src_track.artist, src_track.album,
+                str(erro), video_id, src_track.isrc, src_track.duration_ms,
+            )
+
+    def _itens() -> Iterator[Tuple[SongInfo, Optional[dict]]]:
+        for pos, src_track in enumerate(src_tracks):
+            registro = None
+            if diario is not None:
+                registro = diario.obter(origem, pos, _chave_faixa(src_track))
+            if registro is None or registro["videoId"] is None:
+                # Se a faixa já está no destino com o mesmo título/artista, nem busca.
+                conhecida = existentes_nomes.get(
+                    (normalizar_texto(src_track.title),
+                     normalizar_texto(src_track.artist))
+                )
+                if conhecida is None and resolucoes is not None:
+                    conhecida = resolucoes.get(_chave_faixa(src_track))
+                yield src_track, conhecida
+            else:
+                yield src_track, {
+                    "videoId": registro["videoId"],
+                    "title": registro["title"] or src_track.title,
+                }
+
+    def _interromper(erro: CircuitoAberto):
+        dica = " com --resume" if diario is not None else ""
+        print(f"ERRO: {erro} Rode novamente{dica} mais tarde.")
+        raise erro
+
+    def _enviar_lote() -> int:
+        try:
+            nao_adicionadas = _adicionar_lote(yt, dst_pl_id, lote)
+        except CircuitoAberto as e:
+            _interromper(e)
+        for pos, video_id, src_track in zip(lote_pos, lote, lote_src):
+            if video_id in nao_adicionadas:
+                # Só conta como adicionada a faixa de um lote que deu certo.
+                tracks_added_set.discard(video_id)
+                _registrar_falha("erro_escrita", pos, src_track,
+                                 "add_playlist_items falhou", video_id)
+            elif diario is not None:
+                diario.registrar(origem, pos, _chave_faixa(src_track), video_id, True)
+        lote.clear()
+        lote_pos.clear()
+        lote_src.clear()
+        return len(nao_adicionadas)
+
+    for pos, (src_track, dst_track, erro) in enumerate(
+        _resolver_em_ordem(yt, _itens(), yt_search_algo,
+                           cache, workers, albuns, estrategia)
+    ):
+        chave = _chave_faixa(src_track)
+        registro = diario.obter(origem, pos, chave) if diario else None
+        if registro is not None and registro["ok"]:
+            tracks_added_set.add(registro["videoId"])
+            continue
 
-    for src_track in src_tracks:
         print(
             f"Spotify:   {src_track.title} - {src_track.artist} - {src_track.album}")
 
-        try:
-            dst_track = buscar_musica(
-                yt, src_track.title, src_track.artist, src_track.album, yt_search_algo
-            )
-        except Exception as e:
-            print(f"ERRO: Não foi possível localizar a faixa no YTMusic: {e}")
+        if erro is not None:
+            if isinstance(erro, CircuitoAberto):
+                _interromper(erro)
+            print(
+                f"ERRO: Não foi possível localizar a faixa no YTMusic: {erro}")
             error_count += 1
+            _registrar_falha(
+                "nao_encontrada" if isinstance(
+                    erro, (ValueError, IndexError)) else "erro_api",
+                pos, src_track, erro,
+            )
             continue
 
         yt_artist_name = "<Desconhecido>"
@@ -289,37 +931,116 @@ def copiar_faixas(
             f"  Youtube: {dst_track['title']} - {yt_artist_name} - {dst_track['album'] if 'album' in dst_track else '<Desconhecido>'}"
         )
 
+        if dst_track["videoId"] in existentes_ids:
+            print("(JÁ NA PLAYLIST: pulando)")
+            present_count += 1
+            if diario is not None:
+                diario.registrar(origem, pos, chave, dst_track["videoId"], True)
+            continue
+
         if dst_track["videoId"] in tracks_added_set:
             print("(DUPLICADO: esta faixa já foi adicionada)")
             duplicate_count += 1
-        tracks_added_set.add(dst_track["videoId"])
-
-        if not dry_run:
-            exception_sleep = 5
-            for _ in range(10):
+            if diario is not None:
+                diario.registrar(origem, pos, chave, dst_track["videoId"], True)
+        elif not dry_run:
+            if diario is not None:
+                diario.registrar(
+                    origem, pos, chave, dst_track["videoId"], False, dst_track["title"])
+            if para_playlist:
+                lote.append(dst_track["videoId"])
+                lote_pos.append(pos)
+                lote_src.append(src_track)
+                if dst_pl_id is not None and len(lote) >= tamanho_lote:
+                    write_errors += _enviar_lote()
+            else:
                 try:
-                    if dst_pl_id is not None:
-                        yt.add_playlist_items(
-                            playlistId=dst_pl_id,
-                            videoIds=[dst_track["videoId"]],
-                            duplicates=False,
-                        )
-                    else:
-                        yt.rate_song(dst_track["videoId"], "LIKE")
-                    break
+                    yt.rate_song(dst_track["videoId"], "LIKE")
+                    if diario is not None:
+                        diario.registrar(
+                            origem, pos, chave, dst_track["videoId"], True)
                 except Exception as e:
+                    if isinstance(e, CircuitoAberto):
+                        _interromper(e)
                     print(
-                        f"ERRO: (Tentando novamente add_playlist_items: {dst_pl_id} {dst_track['videoId']}) {e} em {exception_sleep} s"
-                    )
-                    time.sleep(exception_sleep)
-                    exception_sleep *= 2
+                        f"ERRO: Não foi possível curtir {dst_track['videoId']}: {e}")
+                    write_errors += 1
+                    _registrar_falha("erro_escrita", pos, src_track,
+                                     e, dst_track["videoId"])
+                    continue
+        tracks_added_set.add(dst_track["videoId"])
 
-        if track_sleep:
-            time.sleep(track_sleep)
+    if dst_pl_id is None and criar_com_titulo is not None and not dry_run:
+        dst_pl_id = _ytmusic_criar_playlist(
+            yt,
+            title=criar_com_titulo,
+            description=criar_com_titulo,
+            privacy_status=privacy_status,
+            video_ids=lote,
+            indice=indice,
+        )
+        print(
+            f"NOTA: Playlist criada '{criar_com_titulo}' com ID: {dst_pl_id}")
+        if diario is not None:
+            for pos, video_id, src_track in zip(lote_pos, lote, lote_src):
+                diario.registrar(origem, pos, _chave_faixa(src_track), video_id, True)
+    elif lote:
+        write_errors += _enviar_lote()
+
+    # Com escritas pendentes, a playlist fica em aberto para o --resume.
+    if diario is not None and not write_errors:
+        diario.registrar_conclusao(origem)
 
     print()
     print(
-        f"Adicionadas {len(tracks_added_set)} faixas, {duplicate_count} duplicadas, {error_count} erros."
+        f"Adicionadas {len(tracks_added_set)} faixas, {duplicate_count} duplicadas, "
+        f"{present_count} já presentes, {error_count + write_errors} erros."
+    )
+    if resumir_estrategia and estrategia.buscas:
+        print(estrategia.resumo())
+    return dst_pl_id
+
+
+def copiar_albuns_curtidos(
+    biblioteca,
+    dry_run: bool = False,
+    track_sleep: float = 0.1,
+    yt_search_algo: int = 0,
+    cache: Optional[CacheBusca] = None,
+    workers: int = 1,
+    diario: Optional[DiarioMigracao] = None,
+    falhas: Optional[RegistroFalhas] = None,
+    por_album: bool = True,
+):
+    """
+    Curte no YTMusic as faixas dos álbuns curtidos no Spotify. Com
+    `por_album`, cada álbum é resolvido de uma vez (`resolver_albuns`) e só
+    as faixas que não puderam ser alinhadas são buscadas individualmente.
+    """
+    yt = obter_ytmusic(track_sleep)
+    albuns = CacheAlbuns(cache)
+    resolucoes = None
+    if por_album:
+        try:
+            resolucoes = resolver_albuns(yt, biblioteca.albuns, albuns, workers)
+        except CircuitoAberto as e:
+            dica = " com --resume" if diario is not None else ""
+            print(f"ERRO: {e} Rode novamente{dica} mais tarde.")
+            raise
+    copiar_faixas(
+        iterar_albuns_curtidos_spotify(biblioteca=biblioteca),
+        None,
+        dry_run,
+        track_sleep,
+        yt_search_algo,
+        yt=yt,
+        cache=cache,
+        workers=workers,
+        diario=diario,
+        origem="Liked Albums",
+        albuns=albuns,
+        falhas=falhas,
+        resolucoes=resolucoes,
     )
 
 
@@ -332,10 +1053,26 @@ def copiar_playlist(
     yt_search_algo: int = 0,
     reverse_playlist: bool = True,
     privacy_status: str = "PRIVATE",
+    spotify_playlists_file: str = "playlists.json",
+    cache: Optional[CacheBusca] = None,
+    workers: int = 1,
+    tamanho_lote: int = 100,
+    criar_com_faixas: bool = False,
+    diario: Optional[DiarioMigracao] = None,
+    streaming: bool = False,
+    falhas: Optional[RegistroFalhas] = None,
 ):
-    """Copia uma playlist do Spotify para uma do YTMusic."""
+    """
+    Copia uma playlist do Spotify para uma do YTMusic.
+
+    Com `criar_com_faixas`, uma playlist destino nova só é criada depois de
+    resolvidas as faixas, já com todas elas. Com `streaming`, o
+    `playlists.json` é lido em fluxo em vez de carregado inteiro.
+    """
     print("Usando algoritmo de busca nº:", yt_search_algo)
-    yt = obter_ytmusic()
+    yt = obter_ytmusic(track_sleep)
+    biblioteca = abrir_biblioteca(
+        spotify_playlists_file, spotify_playlists_encoding, streaming=streaming)
     pl_name: str = ""
 
     if ytmusic_playlist_id.startswith("+"):
@@ -347,11 +1084,13 @@ def copiar_playlist(
         if pl_name == "":
             print(
                 "Nenhum nome/ID da playlist de destino informado; criando nome a partir do Spotify…")
-            spotify_pls: dict = carregar_playlists_json()
-            for pl in spotify_pls["playlists"]:
-                if len(pl.keys()) > 3 and pl["id"] == spotify_playlist_id:
-                    pl_name = pl["name"]
+            try:
+                pl_name = biblioteca.buscar_playlist(
+                    spotify_playlist_id)["name"]
+            except ValueError:
+                pass
 
+    if ytmusic_playlist_id is None and not criar_com_faixas:
         ytmusic_playlist_id = _ytmusic_criar_playlist(
             yt, title=pl_name, description=pl_name, privacy_status=privacy_status
         )
@@ -364,14 +1103,24 @@ def copiar_playlist(
     copiar_faixas(
         iterar_playlist_spotify(
             spotify_playlist_id,
-            spotify_encoding=spotify_playlists_encoding,
             reverse_playlist=reverse_playlist,
+            biblioteca=biblioteca,
+            falhas=falhas,
+            destino=ytmusic_playlist_id or "+" + pl_name,
         ),
         ytmusic_playlist_id,
         dry_run,
         track_sleep,
         yt_search_algo,
         yt=yt,
+        cache=cache,
+        workers=workers,
+        tamanho_lote=tamanho_lote,
+        criar_com_titulo=pl_name if ytmusic_playlist_id is None else None,
+        privacy_status=privacy_status,
+        diario=diario,
+        origem=spotify_playlist_id,
+        falhas=falhas,
     )
 
 
@@ -382,39 +1131,484 @@ def copiar_todas_playlists(
     yt_search_algo: int = 0,
     reverse_playlist: bool = True,
     privacy_status: str = "PRIVATE",
+    spotify_playlists_file: str = "playlists.json",
+    cache: Optional[CacheBusca] = None,
+    workers: int = 1,
+    tamanho_lote: int = 100,
+    criar_com_faixas: bool = False,
+    diario: Optional[DiarioMigracao] = None,
+    streaming: bool = False,
+    falhas: Optional[RegistroFalhas] = None,
+    incluir_curtidas: bool = False,
+    resolucao_global: bool = True,
 ):
-    """Copia todas as playlists do Spotify (exceto 'Músicas Curtidas') para o YTMusic."""
-    spotify_pls = carregar_playlists_json()
-    yt = obter_ytmusic()
+    """
+    Copia todas as playlists do Spotify (exceto 'Músicas Curtidas') para o YTMusic.
+    Com `diario` retomado, playlists já concluídas são puladas. Com
+    `streaming`, o `playlists.json` é percorrido em fluxo.
+
+    Com `resolucao_global`, uma etapa de planejamento busca antes cada faixa
+    distinta de todas as playlists selecionadas uma única vez, e o resultado
+    é reaproveitado em cada destino. Ficam de fora do planejamento as faixas
+    que a cópia não buscaria: as já presentes na playlist destino e as já
+    resolvidas no `diario`. Com `incluir_curtidas`, as 'Liked Songs'
+    também entram (curtidas no YTMusic, como em `carregar_curtidas`).
+    """
+    biblioteca = abrir_biblioteca(
+        spotify_playlists_file, spotify_playlists_encoding, streaming=streaming)
+    yt = obter_ytmusic(track_sleep)
+    albuns = CacheAlbuns(cache)
+    estrategia = EstrategiaBusca()
+    indice = IndicePlaylistsYT(yt)
+
+    def _pular(src_pl: dict) -> bool:
+        origem = "Liked Songs" if str(src_pl.get("name")) == "Liked Songs" else src_pl["id"]
+        if origem == "Liked Songs" and not incluir_curtidas:
+            return True
+        return diario is not None and diario.playlist_concluida(origem)
 
-    for src_pl in spotify_pls["playlists"]:
+    # Playlists destino baixadas no planejamento, reaproveitadas na cópia.
+    destinos: Dict[str, dict] = {}
+
+    def _pendentes(src_pl: dict, itens: Iterable[dict]) -> Iterator[SongInfo]:
+        """Faixas que `copiar_faixas` ainda buscaria, nas mesmas posições."""
+        curtidas = str(src_pl.get("name")) == "Liked Songs"
+        origem = "Liked Songs" if curtidas else src_pl["id"]
+        existentes: Dict[Tuple[str, str], dict] = {}
+        if not curtidas:
+            pl_name = src_pl["name"] or f"Spotify Playlist sem nome {src_pl['id']}"
+            dst_pl_id = obter_id_playlist_por_nome(yt, pl_name, indice)
+            if dst_pl_id is not None:
+                try:
+                    destinos[dst_pl_id] = yt.get_playlist(playlistId=dst_pl_id, limit=None)
+                    _, existentes = _indexar_faixas_playlist(
+                        destinos[dst_pl_id].get("tracks") or [])
+                except CircuitoAberto:
+                    raise
+                except Exception as e:
+                    print(f"AVISO: Não foi possível ler a playlist '{pl_name}' ({e}).")
+            if reverse_playlist:
+                itens = reversed(list(itens))
+        for pos, src_track in enumerate(_faixas_validas(itens)):
+            if diario is not None:
+                registro = diario.obter(origem, pos, _chave_faixa(src_track))
+                if registro is not None and registro["videoId"] is not None:
+                    continue
+            chave = (normalizar_texto(src_track.title), normalizar_texto(src_track.artist))
+            if chave not in existentes:
+                yield src_track
+
+    resolucoes = None
+    if resolucao_global:
+        resolucoes = planejar_resolucoes(
+            yt,
+            (
+                _pendentes(src_pl, itens)
+                for src_pl, itens in biblioteca.iterar_playlists()
+                if not _pular(src_pl)
+            ),
+            yt_search_algo,
+            cache,
+            workers,
+            albuns,
+            estrategia,
+        )
+
+    for src_pl, itens in biblioteca.iterar_playlists(reverso=reverse_playlist):
         if str(src_pl.get("name")) == "Liked Songs":
             continue
 
         pl_name = src_pl["name"] or f"Spotify Playlist sem nome {src_pl['id']}"
+        if diario is not None and diario.playlist_concluida(src_pl["id"]):
+            print(f"Playlist '{pl_name}' já concluída (diário), pulando.")
+            continue
 
-        dst_pl_id = obter_id_playlist_por_nome(yt, pl_name)
+        dst_pl_id = obter_id_playlist_por_nome(yt, pl_name, indice)
         print(f"Buscando playlist '{pl_name}': id={dst_pl_id}")
-        if dst_pl_id is None:
+        if dst_pl_id is None and not criar_com_faixas:
             dst_pl_id = _ytmusic_criar_playlist(
-                yt, title=pl_name, description=pl_name, privacy_status=privacy_status
+                yt,
+                title=pl_name,
+                description=pl_name,
+                privacy_status=privacy_status,
+                indice=indice,
             )
             if isinstance(dst_pl_id, dict):
                 print(f"ERRO: Falha ao criar playlist: {dst_pl_id}")
                 sys.exit(1)
             print(f"NOTA: Playlist criada '{pl_name}' com ID: {dst_pl_id}")
 
+        print(f"== Playlist Spotify: {src_pl['name']}")
         copiar_faixas(
-            iterar_playlist_spotify(
-                src_pl["id"],
-                spotify_encoding=spotify_playlists_encoding,
-                reverse_playlist=reverse_playlist,
-            ),
+            _converter_faixas(itens, falhas, src_pl["id"], dst_pl_id or "+" + pl_name),
             dst_pl_id,
             dry_run,
             track_sleep,
             yt_search_algo,
+            yt=yt,
+            cache=cache,
+            workers=workers,
+            tamanho_lote=tamanho_lote,
+            criar_com_titulo=pl_name if dst_pl_id is None else None,
+            privacy_status=privacy_status,
+            diario=diario,
+            origem=src_pl["id"],
+            albuns=albuns,
+            indice=indice,
+            falhas=falhas,
+            resolucoes=resolucoes,
+            estrategia=estrategia,
+            playlist_destino=destinos.pop(dst_pl_id, None),
         )
         print("\nPlaylist concluída!\n")
 
+    if incluir_curtidas:
+        src_pl = None
+        try:
+            src_pl = biblioteca.buscar_playlist(None)
+        except ValueError:
+            print("Nenhuma playlist 'Liked Songs' no backup.")
+        if src_pl is not None and not _pular(src_pl):
+            print("== Playlist Spotify: Liked Songs")
+            copiar_faixas(
+                _converter_faixas(biblioteca.faixas(src_pl), falhas, "Liked Songs"),
+                None,
+                dry_run,
+                track_sleep,
+                yt_search_algo,
+                yt=yt,
+                cache=cache,
+                workers=workers,
+                diario=diario,
+                origem="Liked Songs",
+                albuns=albuns,
+                falhas=falhas,
+                resolucoes=resolucoes,
+                estrategia=estrategia,
+            )
+
+    print(estrategia.resumo())
     print("Tudo pronto!")
+
+
+class _FalhasNasPosicoes:
+    """
+    Repassa os registros de `copiar_faixas` a um `RegistroFalhas`, trocando
+    a posição (relativa às faixas copiadas) pela posição original na playlist.
+    """
+
+    def __init__(self, falhas: RegistroFalhas, posicoes: List[Optional[int]]):
+        self.falhas = falhas
+        self.posicoes = posicoes
+
+    def registrar(self, motivo, origem, destino, posicao, *args, **kwargs) -> None:
+        if posicao is not None and 0 <= posicao < len(self.posicoes):
+            posicao = self.posicoes[posicao]
+        self.falhas.registrar(motivo, origem, destino, posicao, *args, **kwargs)
+
+
+def reprocessar_falhas(
+    arquivo_falhas: str = "falhas.jsonl",
+    yt_search_algo: int = 0,
+    dry_run: bool = False,
+    track_sleep: float = 0.1,
+    privacy_status: str = "PRIVATE",
+    cache: Optional[CacheBusca] = None,
+    workers: int = 1,
+    tamanho_lote: int = 100,
+):
+    """
+    Tenta de novo apenas as faixas registradas em `arquivo_falhas`, agrupadas
+    por playlist de destino. O que ainda falhar é gravado num arquivo
+    temporário que só substitui `arquivo_falhas` se tudo for reprocessado;
+    se a execução for interrompida, o arquivo original fica intacto (em
+    `dry_run` ele nunca é alterado). Registros repetidos são tentados uma vez
+    e itens malformados são mantidos como estão.
+    """
+    registros = RegistroFalhas.ler(arquivo_falhas)
+    if not registros:
+        print(f"Nenhuma falha registrada em '{arquivo_falhas}'.")
+        return
+
+    grupos: Dict[Tuple[Optional[str], Optional[str]], List[dict]] = {}
+    malformadas: List[dict] = []
+    vistos = set()
+    for registro in registros:
+        # O registro é acrescentado a cada execução; a mesma falha pode se repetir.
+        chave = tuple(registro.get(k) for k in
+                      ("motivo", "origem", "destino", "pos", "title", "artist", "album"))
+        if chave in vistos:
+            continue
+        vistos.add(chave)
+        if registro.get("motivo") == "malformada":
+            malformadas.append(registro)
+            continue
+        grupos.setdefault(
+            (registro.get("origem"), registro.get("destino")), []
+        ).append(registro)
+
+    print(
+        f"{len(vistos) - len(malformadas)} faixas para reprocessar em "
+        f"{len(grupos)} playlists ({len(malformadas)} malformadas ignoradas)."
+    )
+
+    yt = obter_ytmusic(track_sleep)
+    albuns = CacheAlbuns(cache)
+    estrategia = EstrategiaBusca()
+    indice = IndicePlaylistsYT(yt)
+    temporario = arquivo_falhas + ".tmp"
+    falhas = None if dry_run else RegistroFalhas(temporario)
+    concluido = False
+    try:
+        for registro in malformadas:
+            if falhas is not None:
+                falhas.registrar_registro(registro)
+
+        for (origem, destino), itens in grupos.items():
+            criar_com_titulo = None
+            if destino is not None and destino.startswith("+"):
+                criar_com_titulo = destino[1:]
+                destino = obter_id_playlist_por_nome(yt, criar_com_titulo, indice)
+                if destino is not None:
+                    criar_com_titulo = None
+            print(
+                f"== Reprocessando {len(itens)} faixas de '{origem}' -> "
+                f"{destino or criar_com_titulo or 'curtidas'}"
+            )
+            itens = sorted(itens, key=lambda r: r.get("pos") or 0)
+            copiar_faixas(
+                (
+                    SongInfo(r.get("title"), r.get("artist"), r.get("album"),
+                             r.get("isrc"), r.get("duration_ms"))
+                    for r in itens
+                ),
+                destino,
+                dry_run,
+                track_sleep,
+                yt_search_algo,
+                yt=yt,
+                cache=cache,
+                workers=workers,
+                tamanho_lote=tamanho_lote,
+                criar_com_titulo=criar_com_titulo,
+                privacy_status=privacy_status,
+                origem=origem,
+                albuns=albuns,
+                indice=indice,
+                falhas=(
+                    None if falhas is None
+                    else _FalhasNasPosicoes(falhas, [r.get("pos") for r in itens])
+                ),
+                estrategia=estrategia,
+            )
+        print(estrategia.resumo())
+        concluido = True
+    finally:
+        if falhas is not None:
+            falhas.fechar()
+            if concluido:
+                os.replace(temporario, arquivo_falhas)
+                print(f"{falhas.total} faixas continuam com falha em '{arquivo_falhas}'.")
+            else:
+                os.remove(temporario)
+                print(f"Reprocessamento interrompido; '{arquivo_falhas}' não foi alterado.")
+
+
+def _faixa_do_plano(entrada: dict) -> dict:
+    """Faixa do YTMusic no formato usado por `copiar_faixas`, a partir do plano."""
+    return {
+        "videoId": entrada["videoId"],
+        "title": entrada.get("yt_title") or entrada["title"],
+        "artists": [{"name": entrada.get("yt_artist") or "<Desconhecido>"}],
+        "album": entrada.get("yt_album"),
+    }
+
+
+def planejar_migracao(
+    arquivo_plano: str = "plano.json",
+    spotify_playlists_file: str = "playlists.json",
+    spotify_playlists_encoding: str = "utf-8",
+    yt_search_algo: int = 0,
+    playlists: Optional[List[str]] = None,
+    incluir_curtidas: bool = False,
+    reverse_playlist: bool = True,
+    track_sleep: float = 0.1,
+    cache: Optional[CacheBusca] = None,
+    workers: int = 1,
+    streaming: bool = False,
+):
+    """
+    Fase 1 da migração em duas fases: resolve as faixas das playlists do
+    Spotify (todas, ou só as de `playlists`; com `incluir_curtidas`, também
+    as 'Liked Songs') e grava um plano JSON com, para cada faixa, o videoId
+    escolhido, a pontuação e a estratégia que o encontrou. Nada é escrito
+    no YTMusic. O plano pode ser revisado e executado com `aplicar_plano`.
+    """
+    biblioteca = abrir_biblioteca(
+        spotify_playlists_file, spotify_playlists_encoding, streaming=streaming)
+    yt = obter_ytmusic(track_sleep)
+    albuns = CacheAlbuns(cache)
+    estrategia = EstrategiaBusca()
+    selecionadas = set(playlists or [])
+
+    def _selecionada(src_pl: dict) -> bool:
+        if str(src_pl.get("name")) == "Liked Songs":
+            return incluir_curtidas
+        return not selecionadas or str(src_pl.get("id")) in selecionadas
+
+    def _fontes():
+        for src_pl, itens in biblioteca.iterar_playlists():
+            if not _selecionada(src_pl):
+                continue
+            curtidas = str(src_pl.get("name")) == "Liked Songs"
+            # Liked Songs já vêm na ordem certa (veja `carregar_curtidas`).
+            reverso = reverse_playlist and not curtidas
+            yield src_pl, curtidas, _faixas_validas(
+                reversed(list(itens)) if reverso else itens)
+
+    resolucoes = planejar_resolucoes(
+        yt,
+        (
+            _faixas_validas(itens)
+            for src_pl, itens in biblioteca.iterar_playlists()
+            if _selecionada(src_pl)
+        ),
+        yt_search_algo,
+        cache,
+        workers,
+        albuns,
+        estrategia,
+    )
+    print(estrategia.resumo())
+
+    destinos = []
+    resumo = {"ok": 0, "erro": 0}
+    for src_pl, curtidas, faixas in _fontes():
+        nome = src_pl["name"] or f"Spotify Playlist sem nome {src_pl['id']}"
+        entradas = []
+        for pos, src_track in enumerate(faixas):
+            entrada = {
+                "pos": pos,
+                "title": src_track.title,
+                "artist": src_track.artist,
+                "album": src_track.album,
+                "videoId": None,
+            }
+            resultado = resolucoes.get(_chave_faixa(src_track))
+            if isinstance(resultado, dict):
+                artistas = resultado.get("artists") or []
+                album = resultado.get("album")
+                entrada.update(
+                    videoId=resultado["videoId"],
+                    yt_title=resultado.get("title"),
+                    yt_artist=artistas[0]["name"] if artistas else None,
+                    yt_album=album.get("name") if isinstance(album, dict) else album,
+                    score=pontuar_correspondencia(src_track, resultado),
+                    estrategia=estrategia_correspondencia(resultado),
+                )
+                resumo["ok"] += 1
+            else:
+                entrada["erro"] = str(resultado) if resultado is not None else "não resolvida"
+                resumo["erro"] += 1
+            entradas.append(entrada)
+        destinos.append(
+            {
+                "origem": "Liked Songs" if curtidas else src_pl["id"],
+                "nome": nome,
+                # '+nome': playlist buscada pelo nome (e criada se preciso) ao aplicar.
+                "destino": None if curtidas else "+" + nome,
+                "faixas": entradas,
+            }
+        )
+
+    plano = {
+        "versao": 1,
+        "criado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "algo": yt_search_algo,
+        "destinos": destinos,
+    }
+    with open(arquivo_plano, "w", encoding="utf-8") as f:
+        json.dump(plano, f, ensure_ascii=False, indent=1)
+    print(
+        f"Plano gravado em '{arquivo_plano}': {len(destinos)} destinos, "
+        f"{resumo['ok']} faixas resolvidas, {resumo['erro']} sem correspondência."
+    )
+
+
+def aplicar_plano(
+    arquivo_plano: str = "plano.json",
+    dry_run: bool = False,
+    track_sleep: float = 0.1,
+    privacy_status: str = "PRIVATE",
+    tamanho_lote: int = 100,
+    criar_com_faixas: bool = False,
+    pontuacao_minima: Optional[float] = None,
+    diario: Optional[DiarioMigracao] = None,
+    falhas: Optional[RegistroFalhas] = None,
+):
+    """
+    Fase 2: executa um plano de `planejar_migracao` só com chamadas de
+    escrita (em lotes), sem nenhuma busca. Faixas sem videoId, ou com
+    pontuação abaixo de `pontuacao_minima`, são contadas como erro.
+    """
+    with open(arquivo_plano, "r", encoding="utf-8") as f:
+        plano = json.load(f)
+
+    yt = obter_ytmusic(track_sleep)
+    indice = IndicePlaylistsYT(yt)
+    for destino in plano["destinos"]:
+        origem = destino["origem"]
+        if diario is not None and diario.playlist_concluida(origem):
+            print(f"Playlist '{destino['nome']}' já concluída (diário), pulando.")
+            continue
+
+        resolucoes: Resolucoes = {}
+        faixas: List[SongInfo] = []
+        for entrada in destino["faixas"]:
+            src_track = SongInfo(entrada["title"], entrada["artist"], entrada["album"])
+            faixas.append(src_track)
+            if entrada.get("videoId") is None:
+                resolucoes[_chave_faixa(src_track)] = ValueError(
+                    entrada.get("erro") or "sem videoId no plano")
+            elif pontuacao_minima is not None and (entrada.get("score") or 0) < pontuacao_minima:
+                resolucoes[_chave_faixa(src_track)] = ValueError(
+                    f"pontuação {entrada.get('score')} abaixo de {pontuacao_minima}")
+            else:
+                resolucoes[_chave_faixa(src_track)] = _faixa_do_plano(entrada)
+
+        dst_pl_id = destino["destino"]
+        criar_com_titulo = None
+        if dst_pl_id is not None and dst_pl_id.startswith("+"):
+            nome = dst_pl_id[1:]
+            dst_pl_id = obter_id_playlist_por_nome(yt, nome, indice)
+            print(f"Buscando playlist '{nome}': id={dst_pl_id}")
+            if dst_pl_id is None and (criar_com_faixas or dry_run):
+                # Em dry-run, `copiar_faixas` mostra as faixas sem criar a playlist.
+                criar_com_titulo = nome
+                if dry_run:
+                    print(f"(dry-run) A playlist '{nome}' seria criada.")
+            elif dst_pl_id is None:
+                dst_pl_id = _ytmusic_criar_playlist(
+                    yt, title=nome, description=nome,
+                    privacy_status=privacy_status, indice=indice,
+                )
+                print(f"NOTA: Playlist criada '{nome}' com ID: {dst_pl_id}")
+
+        print(f"== Aplicando plano: {destino['nome']}")
+        copiar_faixas(
+            iter(faixas),
+            dst_pl_id,
+            dry_run,
+            track_sleep,
+            plano.get("algo", 0),
+            yt=yt,
+            tamanho_lote=tamanho_lote,
+            criar_com_titulo=criar_com_titulo,
+            privacy_status=privacy_status,
+            diario=diario,
+            origem=origem,
+            indice=indice,
+            falhas=falhas,
+            resolucoes=resolucoes,
+        )
+    print("Plano aplicado!")
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class BibliotecaSpotify:
+    """
+    Backup do Spotify (`playlists.json`) carregado uma única vez, com índices
+    de playlists por ID e por nome.
+    """
+
+    def __init__(self, dados: dict):
+        self.dados = dados
+        self.playlists: List[dict] = dados.get("playlists", [])
+        self.albuns: List[dict] = dados.get("albums", [])
+        self.por_id: Dict[str, dict] = {}
+        self.por_nome: Dict[str, dict] = {}
+        for src_pl in self.playlists:
+            if src_pl.get("id") is not None:
+                self.por_id.setdefault(str(src_pl["id"]), src_pl)
+            self.por_nome.setdefault(str(src_pl.get("name")), src_pl)
+
+    def buscar_playlist(self, src_pl_id: Optional[str]) -> dict:
+        """Playlist pelo ID (ou 'Liked Songs' se None)."""
+        if src_pl_id is None:
+            src_pl = self.por_nome.get("Liked Songs")
+        else:
+            src_pl = self.por_id.get(str(src_pl_id))
+        if src_pl is None:
+            raise ValueError(
+                f"Não foi possível encontrar a playlist do Spotify {src_pl_id}")
+        return src_pl
+
+    def faixas(self, src_pl: dict, reverso: bool = False) -> Iterable[dict]:
+        """Itens de faixa da playlist (no formato da API do Spotify)."""
+        if reverso:
+            return reversed(src_pl["tracks"])
+        return src_pl["tracks"]
+
+    def total_faixas(self, src_pl: dict) -> int:
+        return len(src_pl["tracks"])
+
+    def iterar_playlists(self, reverso: bool = False):
+        """Pares (playlist, itens de faixa), na ordem do arquivo."""
+        for src_pl in self.playlists:
+            yield src_pl, self.faixas(src_pl, reverso)
+
+
+_bibliotecas: Dict[Tuple[str, str], Tuple[Tuple[float, int], BibliotecaSpotify]] = {}
+_bibliotecas_lock = threading.Lock()
+
+
+def carregar_biblioteca(
+    filename: str = "playlists.json", encoding: str = "utf-8"
+) -> BibliotecaSpotify:
+    """
+    Carrega o backup do Spotify. O resultado é reaproveitado enquanto o
+    arquivo não mudar, então várias chamadas no mesmo processo leem o JSON uma vez só.
+    """
+    caminho = os.path.abspath(filename)
+    stat = os.stat(caminho)
+    versao = (stat.st_mtime, stat.st_size)
+    with _bibliotecas_lock:
+        memo = _bibliotecas.get((caminho, encoding))
+        if memo is not None and memo[0] == versao:
+            return memo[1]
+        with open(caminho, "r", encoding=encoding) as f:
+            biblioteca = BibliotecaSpotify(json.load(f))
+        _bibliotecas[(caminho, encoding)] = (versao, biblioteca)
+        return biblioteca
+
+
+class _LeitorJSON:
+    """
+    Leitor incremental de JSON: percorre objetos e arrays membro a membro,
+    decodificando apenas um valor por vez, sem carregar o arquivo inteiro.
+    """
+
+    _ESPACOS = " \t\r\n"
+
+    def __init__(self, arquivo, tamanho_bloco: int = 1 << 16):
+        self._arquivo = arquivo
+        self._tamanho_bloco = tamanho_bloco
+        self._buf = ""
+        self._pos = 0
+        self._fim = False
+        self._decoder = json.JSONDecoder()
+
+    def _ler_mais(self) -> bool:
+        # Lê pelo menos o tamanho do que ainda está pendente (crescimento geométrico).
+        restante = self._buf[self._pos:]
+        bloco = self._arquivo.read(max(self._tamanho_bloco, len(restante)))
+        self._buf = restante + bloco
+        self._pos = 0
+        if not bloco:
+            self._fim = True
+        return bool(bloco)
+
+    def espiar(self) -> str:
+        """Próximo caractere significativo (sem consumir), ou '' no fim do arquivo."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in self._ESPACOS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._ler_mais():
+                return ""
+
+    def consumir(self, esperado: str) -> None:
+        encontrado = self.espiar()
+        if encontrado != esperado:
+            raise ValueError(
+                f"JSON inválido: esperado '{esperado}', encontrado '{encontrado}'")
+        self._pos += 1
+
+    def valor(self):
+        """Decodifica o próximo valor completo."""
+        self.espiar()
+        while True:
+            try:
+                valor, fim = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._ler_mais():
+                    continue
+                raise
+            # Um número no fim do buffer pode estar incompleto.
+            if (
+                isinstance(valor, (int, float))
+                and not self._fim
+                and not self._buf[fim:].lstrip("0123456789.eE+-")
+                and self._ler_mais()
+            ):
+                continue
+            self._pos = fim
+            return valor
+
+    def membros(self) -> Iterable[str]:
+        """Itera as chaves de um objeto; o chamador deve consumir cada valor."""
+        self.consumir("{")
+        if self.espiar() == "}":
+            self._pos += 1
+            return
+        while True:
+            chave = self.valor()
+            self.consumir(":")
+            yield chave
+            if self.espiar() == ",":
+                self._pos += 1
+                continue
+            self.consumir("}")
+            return
+
+    def elementos(self) -> Iterable[None]:
+        """Itera os elementos de um array; o chamador deve consumir cada um."""
+        self.consumir("[")
+        if self.espiar() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            if self.espiar() == ",":
+                self._pos += 1
+                continue
+            self.consumir("]")
+            return
+
+    def pular(self, niveis: int = 1) -> None:
+        """
+        Descarta o próximo valor. Arrays/objetos são percorridos por até
+        `niveis` níveis, e só os valores abaixo disso são decodificados inteiros.
+        """
+        c = self.espiar()
+        if niveis > 0 and c == "[":
+            for _ in self.elementos():
+                self.pular(niveis - 1)
+        elif niveis > 0 and c == "{":
+            for _ in self.membros():
+                self.pular(niveis - 1)
+        else:
+            self.valor()
+
+
+def _enxugar_item(item: dict) -> dict:
+    """Mantém só os campos de uma faixa do Spotify usados na migração."""
+    track = item.get("track")
+    if track is None:
+        return {"track": None}
+    return {
+        "track": {
+            "name": track.get("name"),
+            "artists": (track.get("artists") or [])[:1],
+            "album": {"name": (track.get("album") or {}).get("name")},
+            "duration_ms": track.get("duration_ms"),
+            "external_ids": {"isrc": (track.get("external_ids") or {}).get("isrc")},
+        }
+    }
+
+
+class BibliotecaStreaming:
+    """
+    Leitura em fluxo do backup do Spotify, para arquivos grandes demais para
+    `json.load`. O arquivo é relido a cada consulta e só uma faixa (ou um
+    álbum) fica em memória por vez; com `reverso`, a playlist em questão é
+    guardada em forma reduzida para poder ser invertida.
+    """
+
+    def __init__(self, filename: str = "playlists.json", encoding: str = "utf-8"):
+        self.filename = filename
+        self.encoding = encoding
+        self._metadados: Optional[List[dict]] = None
+
+    def _iterar(self, reverso: bool = False, so_metadados: bool = False):
+        """Passada única pelas playlists, devolvendo (metadados, itens)."""
+        with open(self.filename, "r", encoding=self.encoding) as f:
+            leitor = _LeitorJSON(f)
+            for secao in leitor.membros():
+                if secao != "playlists":
+                    leitor.pular()
+                    continue
+                for _ in leitor.elementos():
+                    meta: dict = {}
+                    for chave in leitor.membros():
+                        if chave != "tracks":
+                            meta[chave] = leitor.valor()
+                            continue
+                        if leitor.espiar() != "[":
+                            meta[chave] = leitor.valor()
+                            continue
+                        if so_metadados:
+                            total = 0
+                            for _ in leitor.elementos():
+                                leitor.valor()
+                                total += 1
+                            meta["_total_faixas"] = total
+                            continue
+                        itens = self._itens(leitor, reverso)
+                        yield meta, itens
+                        for _ in itens:  # consome o que o chamador não leu
+                            pass
+                    if so_metadados:
+                        yield meta, None
+
+    @staticmethod
+    def _itens(leitor: _LeitorJSON, reverso: bool) -> Iterable[dict]:
+        if reverso:
+            itens = []
+            for _ in leitor.elementos():
+                itens.append(_enxugar_item(leitor.valor()))
+            yield from reversed(itens)
+            return
+        for _ in leitor.elementos():
+            yield leitor.valor()
+
+    @property
+    def playlists(self) -> List[dict]:
+        """Metadados das playlists (sem as faixas)."""
+        if self._metadados is None:
+            self._metadados = [
+                meta for meta, _ in self._iterar(so_metadados=True)]
+        return self._metadados
+
+    def iterar_playlists(self, reverso: bool = False):
+        """Percorre todas as playlists numa única leitura do arquivo."""
+        return self._iterar(reverso)
+
+    def buscar_playlist(self, src_pl_id: Optional[str]) -> dict:
+        """Playlist pelo ID (ou 'Liked Songs' se None)."""
+        for meta in self.playlists:
+            if src_pl_id is None and str(meta.get("name")) == "Liked Songs":
+                return meta
+            if src_pl_id is not None and str(meta.get("id")) == src_pl_id:
+                return meta
+        raise ValueError(
+            f"Não foi possível encontrar a playlist do Spotify {src_pl_id}")
+
+    def faixas(self, src_pl: dict, reverso: bool = False) -> Iterable[dict]:
+        for meta, itens in self._iterar(reverso):
+            if meta.get("id", meta.get("name")) == src_pl.get("id", src_pl.get("name")):
+                yield from itens
+                return
+
+    def total_faixas(self, src_pl: dict) -> int:
+        return src_pl.get("_total_faixas", 0)
+
+    @property
+    def albuns(self) -> Iterable[dict]:
+        """Álbuns curtidos, um por vez."""
+        with open(self.filename, "r", encoding=self.encoding) as f:
+            leitor = _LeitorJSON(f)
+            for secao in leitor.membros():
+                if secao != "albums":
+                    # playlists → playlist → faixas: decodifica uma faixa por vez.
+                    leitor.pular(niveis=3)
+                    continue
+                for _ in leitor.elementos():
+                    yield leitor.valor()
+
+
+_ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS artistas (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS albuns (
+    id INTEGER PRIMARY KEY,
+    chave TEXT NOT NULL UNIQUE,
+    spotify_id TEXT,
+    nome TEXT,
+    data_lancamento TEXT
+);
+CREATE TABLE IF NOT EXISTS album_artistas (
+    album_id INTEGER NOT NULL REFERENCES albuns (id),
+    posicao INTEGER NOT NULL,
+    artista_id INTEGER NOT NULL REFERENCES artistas (id),
+    PRIMARY KEY (album_id, posicao)
+);
+CREATE TABLE IF NOT EXISTS faixas (
+    id INTEGER PRIMARY KEY,
+    chave TEXT NOT NULL UNIQUE,
+    spotify_id TEXT,
+    nome TEXT,
+    uri TEXT,
+    isrc TEXT,
+    duracao_ms INTEGER,
+    album_id INTEGER REFERENCES albuns (id)
+);
+CREATE TABLE IF NOT EXISTS faixa_artistas (
+    faixa_id INTEGER NOT NULL REFERENCES faixas (id),
+    posicao INTEGER NOT NULL,
+    artista_id INTEGER NOT NULL REFERENCES artistas (id),
+    PRIMARY KEY (faixa_id, posicao)
+);
+CREATE TABLE IF NOT EXISTS playlists (
+    id INTEGER PRIMARY KEY,
+    spotify_id TEXT,
+    nome TEXT,
+    snapshot_id TEXT,
+    total_faixas INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS playlists_spotify_id ON playlists (spotify_id);
+CREATE TABLE IF NOT EXISTS itens_playlist (
+    playlist_id INTEGER NOT NULL REFERENCES playlists (id),
+    posicao INTEGER NOT NULL,
+    faixa_id INTEGER REFERENCES faixas (id),
+    adicionado_em TEXT,
+    PRIMARY KEY (playlist_id, posicao)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS albuns_curtidos (
+    posicao INTEGER PRIMARY KEY,
+    album_id INTEGER NOT NULL REFERENCES albuns (id),
+    adicionado_em TEXT
+);
+CREATE TABLE IF NOT EXISTS faixas_album (
+    album_id INTEGER NOT NULL REFERENCES albuns (id),
+    posicao INTEGER NOT NULL,
+    faixa_id INTEGER NOT NULL REFERENCES faixas (id),
+    PRIMARY KEY (album_id, posicao)
+) WITHOUT ROWID;
+"""
+
+
+def eh_sqlite(filename: str) -> bool:
+    """Se o arquivo é um banco SQLite (pelo cabeçalho)."""
+    try:
+        with open(filename, "rb") as f:
+            return f.read(16) == b"SQLite format 3\x00"
+    except OSError:
+        return False
+
+
+class GravadorSQLite:
+    """
+    Grava o backup do Spotify num banco SQLite normalizado: cada faixa,
+    álbum e artista aparece uma vez, e as playlists guardam só referências.
+    Lido de volta por `BibliotecaSQLite`.
+    """
+
+    def __init__(self, filename: str):
+        if os.path.exists(filename):
+            os.remove(filename)
+        self.filename = filename
+        self._db = sqlite3.connect(filename)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.executescript(_ESQUEMA_SQLITE)
+        self._artistas: Dict[str, int] = {}
+
+    def _artista(self, nome) -> int:
+        nome = nome or ""
+        artista_id = self._artistas.get(nome)
+        if artista_id is None:
+            artista_id = self._db.execute(
+                "INSERT INTO artistas (nome) VALUES (?)", (nome,)).lastrowid
+            self._artistas[nome] = artista_id
+        return artista_id
+
+    def _id_por_chave(self, tabela: str, chave: str) -> Optional[int]:
+        row = self._db.execute(
+            f"SELECT id FROM {tabela} WHERE chave = ?", (chave,)).fetchone()
+        return row[0] if row else None
+
+    def _album(self, album: dict) -> int:
+        chave = album.get("id") or f"{album.get('name')}|{album.get('release_date')}"
+        album_id = self._id_por_chave("albuns", chave)
+        if album_id is not None:
+            if album.get("release_date"):
+                # O mesmo álbum pode vir antes por um objeto com menos campos.
+                self._db.execute(
+                    "UPDATE albuns SET data_lancamento = ? "
+                    "WHERE id = ? AND data_lancamento IS NULL",
+                    (album["release_date"], album_id),
+                )
+            return album_id
+        album_id = self._db.execute(
+            "INSERT INTO albuns (chave, spotify_id, nome, data_lancamento) VALUES (?, ?, ?, ?)",
+            (chave, album.get("id"), album.get("name"), album.get("release_date")),
+        ).lastrowid
+        self._db.executemany(
+            "INSERT INTO album_artistas VALUES (?, ?, ?)",
+            [(album_id, pos, self._artista(artista.get("name")))
+             for pos, artista in enumerate(album.get("artists") or [])],
+        )
+        return album_id
+
+    def _faixa(self, track: dict, album_id: Optional[int], chave: str) -> int:
+        isrc = (track.get("external_ids") or {}).get("isrc")
+        faixa_id = self._id_por_chave("faixas", chave)
+        if faixa_id is not None:
+            if isrc:
+                # Faixas de álbuns curtidos vêm sem ISRC; uma playlist pode trazê-lo.
+                self._db.execute(
+                    "UPDATE faixas SET isrc = ? WHERE id = ? AND isrc IS NULL",
+                    (isrc, faixa_id),
+                )
+            return faixa_id
+        faixa_id = self._db.execute(
+            "INSERT INTO faixas (chave, spotify_id, nome, uri, isrc, duracao_ms, album_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (chave, track.get("id"), track.get("name"), track.get("uri"),
+             isrc, track.get("duration_ms"), album_id),
+        ).lastrowid
+        self._db.executemany(
+            "INSERT INTO faixa_artistas VALUES (?, ?, ?)",
+            [(faixa_id, pos, self._artista(artista.get("name")))
+             for pos, artista in enumerate(track.get("artists") or [])],
+        )
+        return faixa_id
+
+    def gravar_albuns(self, itens: Iterable[dict]) -> None:
+        """Grava os álbuns curtidos (itens de `me/albums`), com suas faixas."""
+        with self._db:
+            for pos, item in enumerate(itens):
+                album = item.get("album") or {}
+                album_id = self._album(album)
+                self._db.execute(
+                    "INSERT INTO albuns_curtidos VALUES (?, ?, ?)",
+                    (pos, album_id, item.get("added_at")),
+                )
+                for pos_faixa, track in enumerate((album.get("tracks") or {}).get("items", [])):
+                    chave = track.get("id") or f"{album_id}:{pos_faixa}"
+                    self._db.execute(
+                        "INSERT OR IGNORE INTO faixas_album VALUES (?, ?, ?)",
+                        (album_id, pos_faixa, self._faixa(track, album_id, chave)),
+                    )
+
+    def gravar_playlist(self, playlist: dict) -> None:
+        """Grava uma playlist (com `tracks` já como lista de itens)."""
+        itens = playlist.get("tracks") or []
+        with self._db:
+            playlist_id = self._db.execute(
+                "INSERT INTO playlists (spotify_id, nome, snapshot_id, total_faixas) "
+                "VALUES (?, ?, ?, ?)",
+                (playlist.get("id"), playlist.get("name"),
+                 playlist.get("snapshot_id"), len(itens)),
+            ).lastrowid
+            linhas = []
+            for pos, item in enumerate(itens):
+                track = item.get("track")
+                faixa_id = None
+                if track:
+                    album = track.get("album") or {}
+                    album_id = self._album(album) if album else None
+                    chave = track.get("id") or track.get("uri") or "|".join(
+                        [str(track.get("name")), str(album.get("name"))])
+                    faixa_id = self._faixa(track, album_id, chave)
+                linhas.append((playlist_id, pos, faixa_id, item.get("added_at")))
+            self._db.executemany(
+                "INSERT INTO itens_playlist VALUES (?, ?, ?, ?)", linhas)
+
+    def fechar(self) -> None:
+        self._db.execute("ANALYZE")
+        self._db.commit()
+        self._db.close()
+
+
+class BibliotecaSQLite:
+    """
+    Backup do Spotify no formato SQLite de `GravadorSQLite`, com a mesma
+    interface de `BibliotecaSpotify`. As faixas são lidas do banco sob
+    demanda, então a memória não depende do tamanho da biblioteca.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._db = sqlite3.connect(f"file:{filename}?mode=ro", uri=True)
+        self._metadados: Optional[List[dict]] = None
+        colunas = {linha[1] for linha in self._db.execute("PRAGMA table_info(faixas)")}
+        # Bancos gravados antes de existirem as colunas de ISRC e duração.
+        self._isrc_duracao = (
+            "f.isrc, f.duracao_ms" if {"isrc", "duracao_ms"} <= colunas else "NULL, NULL"
+        )
+
+    def _artistas(self, tabela: str, coluna: str, ident: int) -> List[dict]:
+        return [
+            {"name": nome}
+            for (nome,) in self._db.execute(
+                f"SELECT ar.nome FROM {tabela} x JOIN artistas ar ON ar.id = x.artista_id "
+                f"WHERE x.{coluna} = ? ORDER BY x.posicao",
+                (ident,),
+            )
+        ]
+
+    @property
+    def playlists(self) -> List[dict]:
+        """Metadados das playlists (sem as faixas), na ordem do backup."""
+        if self._metadados is None:
+            self._metadados = []
+            for rowid, spotify_id, nome, snapshot_id, total in self._db.execute(
+                "SELECT id, spotify_id, nome, snapshot_id, total_faixas "
+                "FROM playlists ORDER BY id"
+            ):
+                meta = {"id": spotify_id, "name": nome, "_total_faixas": total, "_rowid": rowid}
+                if snapshot_id is not None:
+                    meta["snapshot_id"] = snapshot_id
+                self._metadados.append(meta)
+        return self._metadados
+
+    def buscar_playlist(self, src_pl_id: Optional[str]) -> dict:
+        """Playlist pelo ID (ou 'Liked Songs' se None)."""
+        if src_pl_id is None:
+            row = self._db.execute(
+                "SELECT id FROM playlists WHERE nome = 'Liked Songs' ORDER BY id LIMIT 1"
+            ).fetchone()
+        else:
+            row = self._db.execute(
+                "SELECT id FROM playlists WHERE spotify_id = ? ORDER BY id LIMIT 1",
+                (str(src_pl_id),),
+            ).fetchone()
+        if row is None:
+            raise ValueError(
+                f"Não foi possível encontrar a playlist do Spotify {src_pl_id}")
+        return next(meta for meta in self.playlists if meta["_rowid"] == row[0])
+
+    def faixas(self, src_pl: dict, reverso: bool = False) -> Iterable[dict]:
+        """Itens de faixa da playlist (no formato da API do Spotify)."""
+        ordem = "DESC" if reverso else "ASC"
+        cursor = self._db.execute(
+            "SELECT i.adicionado_em, f.id, f.spotify_id, f.nome, f.uri, "
+            f"{self._isrc_duracao}, a.nome, a.data_lancamento "
+            "FROM itens_playlist i "
+            "LEFT JOIN faixas f ON f.id = i.faixa_id "
+            "LEFT JOIN albuns a ON a.id = f.album_id "
+            f"WHERE i.playlist_id = ? ORDER BY i.posicao {ordem}",
+            (src_pl["_rowid"],),
+        )
+        for (adicionado_em, faixa_id, spotify_id, nome, uri,
+             isrc, duracao_ms, album, lancamento) in cursor:
+            if faixa_id is None:
+                yield {"added_at": adicionado_em, "track": None}
+                continue
+            yield {
+                "added_at": adicionado_em,
+                "track": {
+                    "id": spotify_id,
+                    "name": nome,
+                    "uri": uri,
+                    "duration_ms": duracao_ms,
+                    "external_ids": {"isrc": isrc},
+                    "artists": self._artistas("faixa_artistas", "faixa_id", faixa_id),
+                    "album": {"name": album, "release_date": lancamento},
+                },
+            }
+
+    def total_faixas(self, src_pl: dict) -> int:
+        return src_pl.get("_total_faixas", 0)
+
+    def iterar_playlists(self, reverso: bool = False):
+        """Pares (playlist, itens de faixa), na ordem do backup."""
+        for src_pl in self.playlists:
+            yield src_pl, self.faixas(src_pl, reverso)
+
+    @property
+    def albuns(self) -> Iterable[dict]:
+        """Álbuns curtidos, um por vez."""
+        albuns = self._db.execute(
+            "SELECT c.adicionado_em, a.id, a.spotify_id, a.nome, a.data_lancamento "
+            "FROM albuns_curtidos c JOIN albuns a ON a.id = c.album_id ORDER BY c.posicao"
+        ).fetchall()
+        for adicionado_em, album_id, spotify_id, nome, lancamento in albuns:
+            faixas = [
+                {
+                    "id": faixa_spotify_id,
+                    "name": faixa_nome,
+                    "duration_ms": duracao_ms,
+                    "external_ids": {"isrc": isrc},
+                    "artists": self._artistas("faixa_artistas", "faixa_id", faixa_id),
+                }
+                for faixa_id, faixa_spotify_id, faixa_nome, isrc, duracao_ms in self._db.execute(
+                    f"SELECT f.id, f.spotify_id, f.nome, {self._isrc_duracao} FROM faixas_album fa "
+                    "JOIN faixas f ON f.id = fa.faixa_id "
+                    "WHERE fa.album_id = ? ORDER BY fa.posicao",
+                    (album_id,),
+                ).fetchall()
+            ]
+            yield {
+                "added_at": adicionado_em,
+                "album": {
+                    "id": spotify_id,
+                    "name": nome,
+                    "release_date": lancamento,
+                    "artists": self._artistas("album_artistas", "album_id", album_id),
+                    "tracks": {"items": faixas},
+                },
+            }
+
+    def fechar(self) -> None:
+        self._db.close()
+
+
+def converter_para_sqlite(
+    origem: str = "playlists.json",
+    destino: str = "playlists.sqlite",
+    encoding: str = "utf-8",
+) -> None:
+    """Converte um `playlists.json` para o formato SQLite, lendo-o em fluxo."""
+    biblioteca = BibliotecaStreaming(origem, encoding)
+    gravador = GravadorSQLite(destino)
+    try:
+        gravador.gravar_albuns(biblioteca.albuns)
+        for src_pl, itens in biblioteca.iterar_playlists():
+            meta = {k: v for k, v in src_pl.items() if not k.startswith("_")}
+            gravador.gravar_playlist({**meta, "tracks": list(itens)})
+    finally:
+        gravador.fechar()
+
+
+def abrir_biblioteca(
+    filename: str = "playlists.json",
+    encoding: str = "utf-8",
+    streaming: bool = False,
+):
+    """
+    Abre o backup do Spotify carregado em memória ou, com `streaming`, em
+    fluxo. Um backup em SQLite (de `GravadorSQLite`) é detectado pelo
+    cabeçalho e sempre lido direto do banco.
+    """
+    if eh_sqlite(filename):
+        return BibliotecaSQLite(filename)
+    if streaming:
+        return BibliotecaStreaming(filename, encoding)
+    return carregar_biblioteca(filename, encoding)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def normalizar_texto(texto: Optional[str]) -> str:
+    """Normaliza um texto para comparações e chaves (minúsculas, espaços colapsados)."""
+    if texto is None:
+        return ""
+    return " ".join(str(texto).casefold().split())
+
+
+class CacheBusca:
+    """
+    Cache persistente (arquivo SQLite) dos resultados de `buscar_musica`.
+
+    As entradas são indexadas por (título, artista, álbum, algoritmo) normalizados,
+    expiram após `ttl` segundos e, quando o cache passa de `max_entradas`, as
+    menos acessadas recentemente são descartadas.
+    """
+
+    _INTERVALO_DESPEJO = 500
+
+    def __init__(
+        self,
+        filename: str = "cache_busca.sqlite",
+        ttl: float = 30 * 24 * 3600,
+        max_entradas: int = 200_000,
+    ):
+        self.filename = filename
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._gravacoes = 0
+        self._db = sqlite3.connect(
+            filename, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS buscas (
+                titulo TEXT NOT NULL,
+                artista TEXT NOT NULL,
+                album TEXT NOT NULL,
+                algo INTEGER NOT NULL,
+                resultado TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL,
+                PRIMARY KEY (titulo, artista, album, algo)
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS buscas_acessado_em ON buscas (acessado_em)")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS valores (
+                chave TEXT PRIMARY KEY,
+                valor TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+        colunas = {linha[1] for linha in self._db.execute("PRAGMA table_info(valores)")}
+        if "acessado_em" not in colunas:
+            # Caches criados antes de `valores` participar do despejo.
+            self._db.execute(
+                "ALTER TABLE valores ADD COLUMN acessado_em REAL NOT NULL DEFAULT 0")
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS valores_acessado_em ON valores (acessado_em)")
+        self._despejar()
+
+    @staticmethod
+    def _chave(title, artist, album, algo) -> tuple:
+        return (
+            normalizar_texto(title),
+            normalizar_texto(artist),
+            normalizar_texto(album),
+            int(algo),
+        )
+
+    def obter(self, title, artist, album, algo) -> Optional[dict]:
+        """Retorna o resultado em cache (ou None se ausente/expirado)."""
+        chave = self._chave(title, artist, album, algo)
+        agora = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT resultado, criado_em FROM buscas "
+                "WHERE titulo = ? AND artista = ? AND album = ? AND algo = ?",
+                chave,
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl and agora - row[1] > self.ttl:
+                self._db.execute(
+                    "DELETE FROM buscas "
+                    "WHERE titulo = ? AND artista = ? AND album = ? AND algo = ?",
+                    chave,
+                )
+                return None
+            self._db.execute(
+                "UPDATE buscas SET acessado_em = ? "
+                "WHERE titulo = ? AND artista = ? AND album = ? AND algo = ?",
+                (agora, *chave),
+            )
+        return json.loads(row[0])
+
+    def salvar(self, title, artist, album, algo, track: dict) -> None:
+        """Grava (ou substitui) o resultado de uma busca."""
+        agora = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO buscas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*self._chave(title, artist, album, algo),
+                 json.dumps(track), agora, agora),
+            )
+            self._gravacoes += 1
+            if self._gravacoes % self._INTERVALO_DESPEJO == 0:
+                self._despejar_sem_lock()
+
+    def obter_valor(self, chave: str):
+        """Lê um valor genérico (ex.: dados de álbum) gravado com `salvar_valor`."""
+        agora = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT valor, criado_em FROM valores WHERE chave = ?", (chave,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl and agora - row[1] > self.ttl:
+                self._db.execute("DELETE FROM valores WHERE chave = ?", (chave,))
+                return None
+            self._db.execute(
+                "UPDATE valores SET acessado_em = ? WHERE chave = ?", (agora, chave))
+        return json.loads(row[0])
+
+    def salvar_valor(self, chave: str, valor) -> None:
+        agora = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO valores VALUES (?, ?, ?, ?)",
+                (chave, json.dumps(valor), agora, agora),
+            )
+            self._gravacoes += 1
+            if self._gravacoes % self._INTERVALO_DESPEJO == 0:
+                self._despejar_sem_lock()
+
+    def invalidar(self, title=None, artist=None, album=None, algo=None) -> int:
+        """
+        Remove entradas que coincidam com os campos informados (os omitidos
+        valem como curinga). Sem nenhum campo, esvazia o cache.
+        Retorna o número de entradas removidas.
+        """
+        filtros = []
+        params = []
+        for coluna, valor in (("titulo", title), ("artista", artist), ("album", album)):
+            if valor is not None:
+                filtros.append(f"{coluna} = ?")
+                params.append(normalizar_texto(valor))
+        if algo is not None:
+            filtros.append("algo = ?")
+            params.append(int(algo))
+        where = (" WHERE " + " AND ".join(filtros)) if filtros else ""
+        with self._lock:
+            if not filtros:
+                self._db.execute("DELETE FROM valores")
+            return self._db.execute(f"DELETE FROM buscas{where}", params).rowcount
+
+    def limpar_expirados(self) -> int:
+        """Remove entradas com mais de `ttl` segundos."""
+        if not self.ttl:
+            return 0
+        limite = time.time() - self.ttl
+        with self._lock:
+            self._db.execute("DELETE FROM valores WHERE criado_em < ?", (limite,))
+            return self._db.execute(
+                "DELETE FROM buscas WHERE criado_em < ?", (limite,)
+            ).rowcount
+
+    def _despejar(self) -> None:
+        with self._lock:
+            self._despejar_sem_lock()
+
+    def _despejar_sem_lock(self) -> None:
+        """
+        Descarta as entradas acessadas há mais tempo se o limite foi excedido
+        (em cada tabela: buscas e valores de álbum).
+        """
+        for tabela in ("buscas", "valores"):
+            total = self._db.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+            excesso = total - self.max_entradas
+            if excesso > 0:
+                self._db.execute(
+                    f"DELETE FROM {tabela} WHERE rowid IN "
+                    f"(SELECT rowid FROM {tabela} ORDER BY acessado_em LIMIT ?)",
+                    (excesso,),
+                )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM buscas").fetchone()[0]
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+class CacheAlbuns:
+    """
+    Memoização das consultas de álbum usadas por `buscar_musica`:
+    consulta → browseIds dos álbuns encontrados, e browseId → faixas do álbum.
+
+    Compartilhada durante uma execução (e entre threads); se `persistente`
+    for informado, os resultados também são gravados nesse `CacheBusca`.
+    """
+
+    def __init__(self, persistente: Optional[CacheBusca] = None):
+        self.persistente = persistente
+        self._memoria: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._locks_chave: Dict[str, threading.Lock] = {}
+
+    def _obter_ou_buscar(self, chave: str, buscar: Callable[[], object]):
+        with self._lock:
+            if chave in self._memoria:
+                return self._memoria[chave]
+            lock_chave = self._locks_chave.setdefault(chave, threading.Lock())
+        # Uma única thread busca cada chave; as demais esperam o resultado.
+        with lock_chave:
+            with self._lock:
+                if chave in self._memoria:
+                    return self._memoria[chave]
+            valor = None
+            if self.persistente is not None:
+                valor = self.persistente.obter_valor(chave)
+            if valor is None:
+                valor = buscar()
+                if self.persistente is not None:
+                    self.persistente.salvar_valor(chave, valor)
+            with self._lock:
+                self._memoria[chave] = valor
+            return valor
+
+    def buscar_albuns(self, yt, album_name, artist_name) -> List[str]:
+        """browseIds dos álbuns retornados para '<álbum> by <artista>'."""
+        query = f"{album_name} by {artist_name}"
+        return self._obter_ou_buscar(
+            "consulta_album:" + normalizar_texto(query),
+            lambda: [
+                album["browseId"]
+                for album in yt.search(query=query, filter="albums")
+                if album.get("browseId")
+            ],
+        )
+
+    def faixas_album(self, yt, browse_id: str) -> List[dict]:
+        """Faixas de um álbum do YTMusic (resultado de `get_album`)."""
+        return self._obter_ou_buscar(
+            "album:" + browse_id,
+            lambda: yt.get_album(browse_id)["tracks"],
+        )
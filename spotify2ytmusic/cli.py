@@ -6,6 +6,95 @@ from argparse import ArgumentParser
 import pprint
 
 from . import backend
+from .biblioteca import abrir_biblioteca, converter_para_sqlite
+from .cache import CacheBusca
+from .diario import DiarioMigracao, RegistroFalhas
+
+
+def _adicionar_argumentos_cache(parser: ArgumentParser) -> None:
+    """Adiciona as opções do cache de buscas a um parser."""
+    parser.add_argument("--cache-file", default="cache_busca.sqlite",
+                        help="Arquivo do cache de buscas (padrão: cache_busca.sqlite).")
+    parser.add_argument("--cache-ttl", type=float, default=30,
+                        help="Validade das entradas do cache, em dias (padrão: 30).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Não consultar nem gravar o cache de buscas.")
+
+
+def _adicionar_argumento_workers(parser: ArgumentParser) -> None:
+    """Adiciona a opção de buscas concorrentes a um parser."""
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de buscas simultâneas no YTMusic (padrão: 1). "
+                             "As faixas continuam sendo adicionadas na ordem original.")
+
+
+def _adicionar_argumento_lote(parser: ArgumentParser) -> None:
+    """Adiciona a opção de tamanho do lote de escrita a um parser."""
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="Quantidade de faixas enviadas por chamada à playlist destino "
+                             "(padrão: 100).")
+
+
+def _adicionar_argumento_criar_com_faixas(parser: ArgumentParser) -> None:
+    """Adiciona a opção de criar playlists novas já com as faixas."""
+    parser.add_argument("--create-with-tracks", action="store_true",
+                        help="Se a playlist destino não existir, resolver todas as faixas antes "
+                             "e criá-la já preenchida, em uma única requisição.")
+
+
+def _adicionar_argumentos_diario(parser: ArgumentParser) -> None:
+    """Adiciona as opções do diário de migração a um parser."""
+    parser.add_argument("--journal", default="migracao.jsonl",
+                        help="Arquivo do diário de progresso da migração (padrão: migracao.jsonl).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retomar a partir do diário, pulando o que já foi concluído. "
+                             "Sem esta opção, só as playlists copiadas recomeçam do zero.")
+
+
+def _abrir_diario(args):
+    """Abre o diário de migração (ou None em --dry-run)."""
+    if args.dry_run:
+        return None
+    return DiarioMigracao(args.journal, retomar=args.resume)
+
+
+def _adicionar_argumento_falhas(parser: ArgumentParser) -> None:
+    """Adiciona a opção do registro de falhas a um parser."""
+    parser.add_argument("--failures", default="falhas.jsonl",
+                        help="Arquivo onde registrar as faixas que falharem, para "
+                             "`reprocessar_falhas` (padrão: falhas.jsonl).")
+
+
+def _abrir_falhas(args):
+    """
+    Abre o registro de falhas (ou None em --dry-run). Os registros são
+    acrescentados ao arquivo, para que um comando não apague as falhas de
+    outro antes de `reprocessar_falhas`.
+    """
+    if args.dry_run:
+        return None
+    return RegistroFalhas(args.failures, anexar=True)
+
+
+def _adicionar_argumento_streaming(parser: ArgumentParser) -> None:
+    """Adiciona a opção de leitura em fluxo do `playlists.json`."""
+    parser.add_argument("--stream-json", action="store_true",
+                        help="Ler o `playlists.json` em fluxo, com pouca memória "
+                             "(para backups muito grandes).")
+
+
+def _adicionar_argumento_arquivo_spotify(parser: ArgumentParser) -> None:
+    """Adiciona a opção do arquivo de backup do Spotify (JSON ou SQLite)."""
+    parser.add_argument("--spotify-playlists-file", default="playlists.json",
+                        help="Backup do Spotify: `playlists.json` ou um banco gerado por "
+                             "`converter_biblioteca` (padrão: playlists.json).")
+
+
+def _abrir_cache(args):
+    """Abre o cache de buscas conforme os argumentos (ou None com --no-cache)."""
+    if args.no_cache:
+        return None
+    return CacheBusca(args.cache_file, ttl=args.cache_ttl * 24 * 3600)
 
 
 def listar_albuns_curtidos():
@@ -21,13 +110,13 @@ def listar_playlists():
     Lista as playlists no Spotify e no YTMusic.
     """
     yt = backend.obter_ytmusic()
-    spotify_pls = backend.carregar_playlists_json()
+    biblioteca = abrir_biblioteca()
 
     # Spotify
     print("== Spotify")
-    for src_pl in spotify_pls["playlists"]:
+    for src_pl in biblioteca.playlists:
         print(
-            f"{src_pl.get('id')} - {src_pl['name']:50} ({len(src_pl['tracks'])} faixas)"
+            f"{src_pl.get('id')} - {src_pl['name']:50} ({biblioteca.total_faixas(src_pl)} faixas)"
         )
 
     print()
@@ -82,6 +171,7 @@ def buscar():
     print("Faixa selecionada:")
     pprint.pprint(ret)
     print()
+    print(f"Estratégia: {details.estrategia}; pontuação: {details.pontuacao}")
     print(f"Sugestões de busca: '{details.suggestions}'")
     if details.songs:
         print("Top 5 músicas retornadas:")
@@ -97,25 +187,39 @@ def carregar_albuns_curtidos():
     def parse_arguments():
         parser = ArgumentParser()
         parser.add_argument("--track-sleep", type=float, default=0.1,
-                            help="Tempo de espera entre cada faixa adicionada (padrão: 0.1).")
+                            help="Intervalo mínimo entre requisições ao YTMusic, em segundos (padrão: 0.1).")
         parser.add_argument("--dry-run", action="store_true",
                             help="Não adicionar faixas (somente simular).")
         parser.add_argument("--spotify-playlists-encoding", default="utf-8",
                             help="Codificação do arquivo `playlists.json`.")
         parser.add_argument("--algo", type=int, default=0,
                             help="Algoritmo de busca (0 = exato, 1 = estendido, 2 = aproximado).")
+        parser.add_argument("--no-album-matching", action="store_true",
+                            help="Buscar cada faixa individualmente, em vez de alinhar o álbum inteiro.")
+        _adicionar_argumento_arquivo_spotify(parser)
+        _adicionar_argumento_streaming(parser)
+        _adicionar_argumentos_cache(parser)
+        _adicionar_argumento_workers(parser)
+        _adicionar_argumentos_diario(parser)
+        _adicionar_argumento_falhas(parser)
         return parser.parse_args()
 
     args = parse_arguments()
 
-    backend.copiar_faixas(
-        backend.iterar_albuns_curtidos_spotify(
-            spotify_encoding=args.spotify_playlists_encoding
+    backend.copiar_albuns_curtidos(
+        abrir_biblioteca(
+            args.spotify_playlists_file,
+            args.spotify_playlists_encoding,
+            streaming=args.stream_json,
         ),
-        None,
         args.dry_run,
         args.track_sleep,
         args.algo,
+        cache=_abrir_cache(args),
+        workers=args.workers,
+        diario=_abrir_diario(args),
+        falhas=_abrir_falhas(args),
+        por_album=not args.no_album_matching,
     )
 
 
@@ -126,7 +230,7 @@ def carregar_curtidas():
     def parse_arguments():
         parser = ArgumentParser()
         parser.add_argument("--track-sleep", type=float, default=0.1,
-                            help="Tempo de espera entre cada faixa adicionada (padrão: 0.1).")
+                            help="Intervalo mínimo entre requisições ao YTMusic, em segundos (padrão: 0.1).")
         parser.add_argument("--dry-run", action="store_true",
                             help="Não adicionar faixas (somente simular).")
         parser.add_argument("--spotify-playlists-encoding", default="utf-8",
@@ -136,6 +240,12 @@ def carregar_curtidas():
         parser.add_argument("--reverse-playlist", action="store_true",
                             help="Inverter a playlist ao carregar. Normalmente NÃO é necessário "
                                  "nas 'Liked Songs' porque a ordem já é oposta aos outros comandos.")
+        _adicionar_argumento_arquivo_spotify(parser)
+        _adicionar_argumento_streaming(parser)
+        _adicionar_argumentos_cache(parser)
+        _adicionar_argumento_workers(parser)
+        _adicionar_argumentos_diario(parser)
+        _adicionar_argumento_falhas(parser)
         return parser.parse_args()
 
     args = parse_arguments()
@@ -143,13 +253,22 @@ def carregar_curtidas():
     backend.copiar_faixas(
         backend.iterar_playlist_spotify(
             None,
-            spotify_encoding=args.spotify_playlists_encoding,
             reverse_playlist=args.reverse_playlist,
+            biblioteca=abrir_biblioteca(
+                args.spotify_playlists_file,
+                args.spotify_playlists_encoding,
+                streaming=args.stream_json,
+            ),
         ),
         None,
         args.dry_run,
         args.track_sleep,
         args.algo,
+        cache=_abrir_cache(args),
+        workers=args.workers,
+        diario=_abrir_diario(args),
+        falhas=_abrir_falhas(args),
+        origem="Liked Songs",
     )
 
 
@@ -160,7 +279,7 @@ def copiar_playlist():
     def parse_arguments():
         parser = ArgumentParser()
         parser.add_argument("--track-sleep", type=float, default=0.1,
-                            help="Tempo de espera entre cada faixa adicionada (padrão: 0.1).")
+                            help="Intervalo mínimo entre requisições ao YTMusic, em segundos (padrão: 0.1).")
         parser.add_argument("--dry-run", action="store_true",
                             help="Não adicionar faixas (somente simular).")
         parser.add_argument("spotify_playlist_id", type=str,
@@ -177,6 +296,14 @@ def copiar_playlist():
                                  "para manter a mesma ordem do Spotify.")
         parser.add_argument("--privacy", default="PRIVATE",
                             help="Privacidade (PRIVATE, PUBLIC, UNLISTED; padrão: PRIVATE).")
+        _adicionar_argumento_arquivo_spotify(parser)
+        _adicionar_argumento_streaming(parser)
+        _adicionar_argumentos_cache(parser)
+        _adicionar_argumento_workers(parser)
+        _adicionar_argumentos_diario(parser)
+        _adicionar_argumento_falhas(parser)
+        _adicionar_argumento_lote(parser)
+        _adicionar_argumento_criar_com_faixas(parser)
         return parser.parse_args()
 
     args = parse_arguments()
@@ -186,8 +313,16 @@ def copiar_playlist():
         track_sleep=args.track_sleep,
         dry_run=args.dry_run,
         spotify_playlists_encoding=args.spotify_playlists_encoding,
+        spotify_playlists_file=args.spotify_playlists_file,
         reverse_playlist=not args.no_reverse_playlist,
         privacy_status=args.privacy,
+        cache=_abrir_cache(args),
+        workers=args.workers,
+        tamanho_lote=args.batch_size,
+        criar_com_faixas=args.create_with_tracks,
+        diario=_abrir_diario(args),
+        streaming=args.stream_json,
+        falhas=_abrir_falhas(args),
     )
 
 
@@ -198,7 +333,7 @@ def copiar_todas_playlists():
     def parse_arguments():
         parser = ArgumentParser()
         parser.add_argument("--track-sleep", type=float, default=0.1,
-                            help="Tempo de espera entre cada faixa adicionada (padrão: 0.1).")
+                            help="Intervalo mínimo entre requisições ao YTMusic, em segundos (padrão: 0.1).")
         parser.add_argument("--dry-run", action="store_true",
                             help="Não adicionar faixas (somente simular).")
         parser.add_argument("--spotify-playlists-encoding", default="utf-8",
@@ -207,8 +342,20 @@ def copiar_todas_playlists():
                             help="Algoritmo de busca (0 = exato, 1 = estendido, 2 = aproximado).")
         parser.add_argument("--no-reverse-playlist", action="store_true",
                             help="NÃO inverter ao carregar. Playlists normais são invertidas por padrão.")
+        parser.add_argument("--include-liked", action="store_true",
+                            help="Também curtir no YTMusic as 'Liked Songs' (como `carregar_curtidas`).")
+        parser.add_argument("--no-global-resolution", action="store_true",
+                            help="Não buscar antes, uma única vez, as faixas repetidas entre playlists.")
         parser.add_argument("--privacy", default="PRIVATE",
                             help="Privacidade (PRIVATE, PUBLIC, UNLISTED; padrão: PRIVATE).")
+        _adicionar_argumento_arquivo_spotify(parser)
+        _adicionar_argumento_streaming(parser)
+        _adicionar_argumentos_cache(parser)
+        _adicionar_argumento_workers(parser)
+        _adicionar_argumentos_diario(parser)
+        _adicionar_argumento_falhas(parser)
+        _adicionar_argumento_lote(parser)
+        _adicionar_argumento_criar_com_faixas(parser)
         return parser.parse_args()
 
     args = parse_arguments()
@@ -216,12 +363,182 @@ def copiar_todas_playlists():
         track_sleep=args.track_sleep,
         dry_run=args.dry_run,
         spotify_playlists_encoding=args.spotify_playlists_encoding,
+        spotify_playlists_file=args.spotify_playlists_file,
         yt_search_algo=args.algo,
         reverse_playlist=not args.no_reverse_playlist,
         privacy_status=args.privacy,
+        cache=_abrir_cache(args),
+        workers=args.workers,
+        tamanho_lote=args.batch_size,
+        criar_com_faixas=args.create_with_tracks,
+        diario=_abrir_diario(args),
+        streaming=args.stream_json,
+        falhas=_abrir_falhas(args),
+        incluir_curtidas=args.include_liked,
+        resolucao_global=not args.no_global_resolution,
+    )
+
+
+def planejar():
+    """
+    Resolve as faixas e grava um plano de migração (sem escrever no YTMusic).
+    """
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument("--output", default="plano.json",
+                            help="Arquivo do plano (padrão: plano.json).")
+        parser.add_argument("--playlist", action="append",
+                            help="ID da playlist do Spotify a incluir (pode repetir; padrão: todas).")
+        parser.add_argument("--include-liked", action="store_true",
+                            help="Incluir as 'Liked Songs' (serão curtidas ao aplicar).")
+        parser.add_argument("--track-sleep", type=float, default=0.1,
+                            help="Intervalo mínimo entre requisições ao YTMusic, em segundos (padrão: 0.1).")
+        parser.add_argument("--spotify-playlists-encoding", default="utf-8",
+                            help="Codificação do arquivo `playlists.json`.")
+        parser.add_argument("--algo", type=int, default=0,
+                            help="Algoritmo de busca (0 = exato, 1 = estendido, 2 = aproximado).")
+        parser.add_argument("--no-reverse-playlist", action="store_true",
+                            help="NÃO inverter ao carregar. Playlists normais são invertidas por padrão.")
+        _adicionar_argumento_arquivo_spotify(parser)
+        _adicionar_argumento_streaming(parser)
+        _adicionar_argumentos_cache(parser)
+        _adicionar_argumento_workers(parser)
+        return parser.parse_args()
+
+    args = parse_arguments()
+    backend.planejar_migracao(
+        args.output,
+        spotify_playlists_file=args.spotify_playlists_file,
+        spotify_playlists_encoding=args.spotify_playlists_encoding,
+        yt_search_algo=args.algo,
+        playlists=args.playlist,
+        incluir_curtidas=args.include_liked,
+        reverse_playlist=not args.no_reverse_playlist,
+        track_sleep=args.track_sleep,
+        cache=_abrir_cache(args),
+        workers=args.workers,
+        streaming=args.stream_json,
+    )
+
+
+def aplicar():
+    """
+    Executa um plano de `planejar`, só com escritas no YTMusic.
+    """
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument("plano", nargs="?", default="plano.json",
+                            help="Arquivo do plano (padrão: plano.json).")
+        parser.add_argument("--track-sleep", type=float, default=0.1,
+                            help="Intervalo mínimo entre requisições ao YTMusic, em segundos (padrão: 0.1).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Não adicionar faixas (somente simular).")
+        parser.add_argument("--privacy", default="PRIVATE",
+                            help="Privacidade (PRIVATE, PUBLIC, UNLISTED; padrão: PRIVATE).")
+        parser.add_argument("--min-score", type=float,
+                            help="Não adicionar faixas com pontuação menor que esta (0 a 1).")
+        _adicionar_argumentos_diario(parser)
+        _adicionar_argumento_falhas(parser)
+        _adicionar_argumento_lote(parser)
+        _adicionar_argumento_criar_com_faixas(parser)
+        return parser.parse_args()
+
+    args = parse_arguments()
+    backend.aplicar_plano(
+        args.plano,
+        dry_run=args.dry_run,
+        track_sleep=args.track_sleep,
+        privacy_status=args.privacy,
+        tamanho_lote=args.batch_size,
+        criar_com_faixas=args.create_with_tracks,
+        pontuacao_minima=args.min_score,
+        diario=_abrir_diario(args),
+        falhas=_abrir_falhas(args),
     )
 
 
+def reprocessar_falhas():
+    """
+    Tenta novamente só as faixas que falharam em uma migração anterior.
+    """
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument("--failures", default="falhas.jsonl",
+                            help="Arquivo de falhas a reprocessar (padrão: falhas.jsonl).")
+        parser.add_argument("--track-sleep", type=float, default=0.1,
+                            help="Intervalo mínimo entre requisições ao YTMusic, em segundos (padrão: 0.1).")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Não adicionar faixas (somente simular).")
+        parser.add_argument("--algo", type=int, default=0,
+                            help="Algoritmo de busca (0 = exato, 1 = estendido, 2 = aproximado).")
+        parser.add_argument("--privacy", default="PRIVATE",
+                            help="Privacidade de playlists criadas (PRIVATE, PUBLIC, UNLISTED; padrão: PRIVATE).")
+        _adicionar_argumentos_cache(parser)
+        _adicionar_argumento_workers(parser)
+        _adicionar_argumento_lote(parser)
+        return parser.parse_args()
+
+    args = parse_arguments()
+    backend.reprocessar_falhas(
+        args.failures,
+        yt_search_algo=args.algo,
+        dry_run=args.dry_run,
+        track_sleep=args.track_sleep,
+        privacy_status=args.privacy,
+        cache=_abrir_cache(args),
+        workers=args.workers,
+        tamanho_lote=args.batch_size,
+    )
+
+
+def converter_biblioteca():
+    """
+    Converte o `playlists.json` num banco SQLite compacto e indexado, que
+    pode ser usado pelos outros comandos com --spotify-playlists-file.
+    """
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument("origem", nargs="?", default="playlists.json",
+                            help="Backup JSON do Spotify (padrão: playlists.json).")
+        parser.add_argument("destino", nargs="?", default="playlists.sqlite",
+                            help="Banco SQLite a gerar (padrão: playlists.sqlite).")
+        parser.add_argument("--spotify-playlists-encoding", default="utf-8",
+                            help="Codificação do arquivo `playlists.json`.")
+        return parser.parse_args()
+
+    args = parse_arguments()
+    converter_para_sqlite(args.origem, args.destino, args.spotify_playlists_encoding)
+    print(f"Biblioteca convertida: {args.destino}")
+
+
+def limpar_cache():
+    """
+    Invalida entradas do cache de buscas (todas, se nenhum filtro for dado).
+    """
+    def parse_arguments():
+        parser = ArgumentParser()
+        parser.add_argument("--cache-file", default="cache_busca.sqlite",
+                            help="Arquivo do cache de buscas (padrão: cache_busca.sqlite).")
+        parser.add_argument("--title", type=str, help="Nome da faixa.")
+        parser.add_argument("--artist", type=str, help="Artista.")
+        parser.add_argument("--album", type=str, help="Nome do álbum.")
+        parser.add_argument("--algo", type=int, help="Algoritmo de busca.")
+        parser.add_argument("--expired", action="store_true",
+                            help="Remover apenas entradas expiradas.")
+        parser.add_argument("--cache-ttl", type=float, default=30,
+                            help="Validade das entradas, em dias (usado com --expired).")
+        return parser.parse_args()
+
+    args = parse_arguments()
+    with CacheBusca(args.cache_file, ttl=args.cache_ttl * 24 * 3600) as cache:
+        if args.expired:
+            removidas = cache.limpar_expirados()
+        else:
+            removidas = cache.invalidar(
+                args.title, args.artist, args.album, args.algo)
+        print(f"{removidas} entradas removidas; {len(cache)} restantes.")
+
+
 def gui():
     """Executa a interface gráfica (GUI)."""
     from . import gui
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import functools
+import re
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# Pesos de cada campo na pontuação; campos ausentes são ignorados e os
+# demais pesos, redistribuídos.
+PESO_TITULO = 0.5
+PESO_ARTISTA = 0.3
+PESO_ALBUM = 0.15
+PESO_DURACAO = 0.05
+
+# Pontuação mínima para aceitar um candidato.
+LIMITE_PADRAO = 0.7
+# Abaixo desta semelhança de título, a pontuação fica limitada a ela: artista
+# e álbum iguais não bastam para aceitar outra música ("Stay" x "Stay With Me").
+TITULO_MINIMO = 0.75
+# Idem para o artista: o mesmo título de outro artista não é a mesma música
+# ("Hello" de Adele x "Hello" de Lionel Richie), ainda mais em vídeos, que não
+# têm álbum para desempatar.
+ARTISTA_MINIMO = 0.6
+
+_ENTRE_PARENTESES = re.compile(r"[\[(].*?[\])]")
+# "(with X)" já sai com os parênteses; fora deles, só "feat." e afins.
+_PARTICIPACAO = re.compile(r"\s(?:feat\.?|ft\.|featuring)\s.*$")
+# "Música - Remastered 2011", "Música - 2011 Remaster", "Música - Ao Vivo";
+# a palavra de versão tem de fechar o título ("Música - Live Forever" fica).
+_SUFIXO_VERSAO = re.compile(
+    r"\s-\s(?:.*\s)?(?:remaster(?:ed)?|live|ao vivo|version|versao|mix|edit"
+    r"|mono|stereo|acustico|acoustic)(?:\s\d{4})?$"
+)
+_PONTUACAO = re.compile(r"[^\w\s]")
+
+
+@functools.lru_cache(maxsize=65536)
+def normalizar_nome(texto: Optional[str]) -> str:
+    """
+    Forma canônica de um nome para comparação: minúsculas, sem acentos
+    ("Coração" → "coracao"), sem trechos entre parênteses/colchetes, sem
+    participações ("feat. X") nem sufixos de versão, sem pontuação.
+    """
+    if not texto:
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto).casefold())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = _ENTRE_PARENTESES.sub(" ", texto)
+    texto = _SUFIXO_VERSAO.sub("", texto)
+    texto = _PARTICIPACAO.sub("", texto)
+    texto = _PONTUACAO.sub(" ", texto)
+    return " ".join(texto.split())
+
+
+class ChavesFaixa(NamedTuple):
+    """Campos normalizados de uma faixa de origem, calculados uma única vez."""
+
+    titulo: str
+    artista: str
+    album: str
+    duracao: Optional[float]
+
+
+@functools.lru_cache(maxsize=65536)
+def chaves_faixa(
+    title: Optional[str],
+    artist: Optional[str],
+    album: Optional[str] = None,
+    duration_ms: Optional[int] = None,
+) -> ChavesFaixa:
+    return ChavesFaixa(
+        normalizar_nome(title),
+        normalizar_nome(artist),
+        normalizar_nome(album),
+        duration_ms / 1000 if duration_ms else None,
+    )
+
+
+def _semelhanca(a: str, b: str, contido: bool = True) -> float:
+    """
+    Semelhança entre nomes normalizados. Com `contido`, um nome contido no
+    outro ("beyonce" em "beyonce jay z") vale no mínimo 0,85.
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    nota = SequenceMatcher(None, a, b).ratio()
+    curto, longo = (a, b) if len(a) <= len(b) else (b, a)
+    if contido and f" {curto} " in f" {longo} ":
+        nota = max(nota, 0.85)
+    return nota
+
+
+def _nota_artista(artista: str, candidato: dict, titulo: str) -> float:
+    nomes = [normalizar_nome(a.get("name")) for a in candidato.get("artists") or []]
+    nota = max((_semelhanca(artista, n) for n in nomes), default=0.0)
+    if len(nomes) > 1:
+        nota = max(nota, _semelhanca(artista, " ".join(nomes)))
+    # Vídeos: o canal costuma ser "ArtistaVEVO" e o artista vem no título.
+    if nota < 0.85 and artista and (
+        any(artista.replace(" ", "") in n.replace(" ", "") for n in nomes)
+        or f" {artista} " in f" {titulo} "
+    ):
+        nota = 0.85
+    return nota
+
+
+def duracao_segundos(candidato: dict) -> Optional[float]:
+    """Duração de um resultado do YTMusic, em segundos (ou None)."""
+    segundos = candidato.get("duration_seconds")
+    if isinstance(segundos, (int, float)) and segundos > 0:
+        return float(segundos)
+    duracao = candidato.get("duration")
+    if isinstance(duracao, str) and re.fullmatch(r"\d+(:\d+)+", duracao):
+        total = 0
+        for parte in duracao.split(":"):
+            total = total * 60 + int(parte)
+        return float(total)
+    return None
+
+
+def pontuar(chaves: ChavesFaixa, candidato: dict) -> float:
+    """
+    Pontuação (0 a 1) de um resultado do YTMusic para a faixa de origem:
+    média ponderada da semelhança de título, artista, álbum e duração.
+    """
+    titulo_bruto = normalizar_nome(candidato.get("title"))
+    notas: List[Tuple[float, float]] = []
+    titulo = titulo_bruto
+    if chaves.artista and titulo.startswith(chaves.artista + " "):
+        # "Artista - Música (Official Video)" → "música"
+        titulo = titulo[len(chaves.artista) + 1:]
+    elif chaves.artista and titulo.endswith(" " + chaves.artista):
+        titulo = titulo[:-len(chaves.artista) - 1]
+    # Títulos não ganham o mínimo por estarem contidos: "stay" está em "stay with me".
+    nota_titulo = max(_semelhanca(chaves.titulo, titulo, contido=False),
+                      _semelhanca(chaves.titulo, titulo_bruto, contido=False))
+    notas.append((PESO_TITULO, nota_titulo))
+    nota_artista = _nota_artista(chaves.artista, candidato, titulo_bruto)
+    notas.append((PESO_ARTISTA, nota_artista))
+
+    album = candidato.get("album")
+    if isinstance(album, dict):
+        album = album.get("name")
+    if chaves.album and album:
+        notas.append((PESO_ALBUM, _semelhanca(chaves.album, normalizar_nome(album))))
+
+    segundos = duracao_segundos(candidato)
+    if chaves.duracao and segundos:
+        # Até 3 s de diferença é a mesma gravação; a partir de 30 s, não conta.
+        diferenca = abs(chaves.duracao - segundos)
+        notas.append((PESO_DURACAO, max(0.0, 1 - max(0.0, diferenca - 3) / 27)))
+
+    nota = sum(peso * nota for peso, nota in notas) / sum(peso for peso, _ in notas)
+    if nota_titulo < TITULO_MINIMO:
+        nota = min(nota, nota_titulo)
+    if nota_artista < ARTISTA_MINIMO:
+        nota = min(nota, nota_artista)
+    return nota
+
+
+def melhor_correspondencia(
+    chaves: ChavesFaixa,
+    candidatos: Iterable[dict],
+    limite: float = LIMITE_PADRAO,
+) -> Tuple[Optional[dict], float]:
+    """
+    Candidato de maior pontuação e a pontuação dele. Devolve (None, nota)
+    se nenhum chegar a `limite`; empates ficam com o que veio primeiro.
+    """
+    melhor, melhor_nota = None, 0.0
+    for candidato in candidatos:
+        if not candidato or not candidato.get("videoId"):
+            continue
+        nota = pontuar(chaves, candidato)
+        if nota > melhor_nota:
+            melhor, melhor_nota = candidato, nota
+    if melhor_nota < limite:
+        return None, melhor_nota
+    return melhor, melhor_nota
+
+
+class EstrategiaBusca:
+    """
+    Ordem adaptativa dos caminhos de busca de `buscar_musica` durante uma
+    execução: 'isrc' (busca pelo ISRC), 'album' (busca do álbum +
+    `get_album`) e 'musica' (busca de músicas). Conta tentativas, acertos
+    e requisições de cada caminho e põe primeiro o que gasta menos
+    requisições por acerto. Caminhos com menos de `min_tentativas` vão na
+    frente (na ordem padrão), para não ficarem sem estatística.
+    Seguro para uso entre threads.
+    """
+
+    CAMINHOS = ("isrc", "album", "musica")
+
+    def __init__(self, min_tentativas: int = 10):
+        self.min_tentativas = min_tentativas
+        self._tentativas = dict.fromkeys(self.CAMINHOS, 0)
+        self._acertos = dict.fromkeys(self.CAMINHOS, 0)
+        self._requisicoes = dict.fromkeys(self.CAMINHOS, 0)
+        self._faixas = 0
+        self._resolvidas = 0
+        self._requisicoes_total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def buscas(self) -> int:
+        """Quantas faixas foram buscadas online até agora."""
+        return self._faixas
+
+    def _prioridade(self, caminho: str) -> Tuple[int, float]:
+        if self._tentativas[caminho] < self.min_tentativas:
+            return 0, self.CAMINHOS.index(caminho)
+        return 1, self._requisicoes[caminho] / max(self._acertos[caminho], 0.5)
+
+    def ordem(self) -> Tuple[str, ...]:
+        """Caminhos na ordem em que devem ser tentados para a próxima faixa."""
+        with self._lock:
+            self._faixas += 1
+            return tuple(sorted(self.CAMINHOS, key=self._prioridade))
+
+    def registrar(self, caminho: str, acertou: bool, requisicoes: int) -> None:
+        with self._lock:
+            self._tentativas[caminho] += 1
+            self._acertos[caminho] += int(acertou)
+            self._requisicoes[caminho] += requisicoes
+
+    def registrar_faixa(self, resolvida: bool, requisicoes: int) -> None:
+        with self._lock:
+            self._resolvidas += int(resolvida)
+            self._requisicoes_total += requisicoes
+
+    def resumo(self) -> str:
+        with self._lock:
+            caminhos = ", ".join(
+                f"{c}: {self._acertos[c]}/{self._tentativas[c]} acertos"
+                for c in self.CAMINHOS
+            )
+            media = self._requisicoes_total / max(self._resolvidas, 1)
+            return (
+                f"Buscas online: {self._resolvidas} faixas resolvidas com "
+                f"{self._requisicoes_total} requisições ({media:.2f} por faixa; "
+                f"{caminhos})."
+            )
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Set
+
+
+class DiarioMigracao:
+    """
+    Diário append-only (JSON Lines) do progresso de uma migração.
+
+    Cada linha registra, para (playlist de origem, posição da faixa), a faixa
+    de origem, o videoId encontrado e se a escrita no YTMusic já foi feita.
+    Com `retomar=True`, o arquivo existente é lido e o trabalho concluído pode
+    ser pulado; caso contrário, o diário começa vazio. Um registro só vale
+    para a mesma faixa: se o backup mudou e a posição agora é de outra, ela
+    é tratada como não migrada.
+
+    O arquivo nunca é truncado. Sem `retomar`, cada playlist de origem gravada
+    recomeça do zero (uma linha 'reiniciada' descarta os registros anteriores
+    dela); as demais mantêm o progresso para um `--resume` futuro.
+    """
+
+    def __init__(self, filename: str = "migracao.jsonl", retomar: bool = False):
+        self.filename = filename
+        self._faixas: Dict[str, Dict[int, dict]] = {}
+        self._concluidas: Set[str] = set()
+        # Origens que ainda precisam da linha 'reiniciada' (só sem `retomar`).
+        self._reiniciar = not retomar
+        self._reiniciadas: Set[str] = set()
+        if retomar and os.path.exists(filename):
+            self._carregar()
+        self._arquivo = open(filename, "a", encoding="utf-8")
+
+    def _carregar(self) -> None:
+        with open(self.filename, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    # Última linha pode ter ficado pela metade se o processo morreu.
+                    continue
+                if registro.get("reiniciada"):
+                    self._concluidas.discard(registro["origem"])
+                    self._faixas.pop(registro["origem"], None)
+                elif registro.get("concluida"):
+                    self._concluidas.add(registro["origem"])
+                else:
+                    self._faixas.setdefault(registro["origem"], {})[registro["pos"]] = registro
+        print(
+            f"Retomando do diário '{self.filename}': "
+            f"{sum(len(f) for f in self._faixas.values())} faixas, "
+            f"{len(self._concluidas)} playlists concluídas."
+        )
+
+    def _gravar(self, registro: dict) -> None:
+        origem = registro["origem"]
+        if self._reiniciar and origem not in self._reiniciadas:
+            self._reiniciadas.add(origem)
+            self._arquivo.write(
+                json.dumps({"origem": origem, "reiniciada": True}, ensure_ascii=False) + "\n")
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+
+    def obter(
+        self, origem: str, posicao: int, faixa: Sequence[str]
+    ) -> Optional[dict]:
+        """
+        Último registro da posição (chaves: videoId, title, ok), ou None se
+        não houver ou se ele for de outra `faixa` (a identidade da faixa de
+        origem, como passada a `registrar`).
+        """
+        registro = self._faixas.get(origem, {}).get(posicao)
+        if registro is None or registro.get("faixa") != list(faixa):
+            return None
+        return registro
+
+    def registrar(
+        self,
+        origem: str,
+        posicao: int,
+        faixa: Sequence[str],
+        video_id: Optional[str],
+        ok: bool,
+        title: Optional[str] = None,
+    ) -> None:
+        """Registra o videoId resolvido para a faixa e se ela já foi escrita."""
+        registro = {
+            "origem": origem,
+            "pos": posicao,
+            "faixa": list(faixa),
+            "videoId": video_id,
+            "title": title,
+            "ok": ok,
+        }
+        self._faixas.setdefault(origem, {})[posicao] = registro
+        self._gravar(registro)
+
+    def playlist_concluida(self, origem: str) -> bool:
+        return origem in self._concluidas
+
+    def registrar_conclusao(self, origem: str) -> None:
+        """Marca a playlist de origem como totalmente migrada."""
+        self._concluidas.add(origem)
+        self._gravar({"origem": origem, "concluida": True})
+
+    def fechar(self) -> None:
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+class RegistroFalhas:
+    """
+    Registro (JSON Lines) das faixas que não puderam ser migradas, com o
+    motivo, para que possam ser reprocessadas depois sem repetir o resto.
+
+    Motivos: 'nao_encontrada' (busca sem resultado), 'erro_api' (falha na
+    API do YTMusic), 'erro_escrita' (faixa encontrada, mas não adicionada) e
+    'malformada' (item inválido no backup do Spotify).
+    """
+
+    def __init__(self, filename: str = "falhas.jsonl", anexar: bool = False):
+        self.filename = filename
+        self.total = 0
+        self._arquivo = open(filename, "a" if anexar else "w", encoding="utf-8")
+
+    @staticmethod
+    def ler(filename: str = "falhas.jsonl") -> List[dict]:
+        """Lê todos os registros de um arquivo de falhas."""
+        if not os.path.exists(filename):
+            return []
+        registros = []
+        with open(filename, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registros.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    continue
+        return registros
+
+    def registrar(
+        self,
+        motivo: str,
+        origem: Optional[str],
+        destino: Optional[str],
+        posicao: Optional[int],
+        title: Optional[str] = None,
+        artist: Optional[str] = None,
+        album: Optional[str] = None,
+        erro: Optional[str] = None,
+        video_id: Optional[str] = None,
+        isrc: Optional[str] = None,
+        duration_ms: Optional[int] = None,
+    ) -> None:
+        self.registrar_registro(
+            {
+                "motivo": motivo,
+                "origem": origem,
+                "destino": destino,
+                "pos": posicao,
+                "title": title,
+                "artist": artist,
+                "album": album,
+                "isrc": isrc,
+                "duration_ms": duration_ms,
+                "videoId": video_id,
+                "erro": erro,
+            }
+        )
+
+    def registrar_registro(self, registro: dict) -> None:
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+        self.total += 1
+
+    def fechar(self) -> None:
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import functools
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+
+def status_http(erro: Exception) -> Optional[int]:
+    """Extrai o status HTTP de uma exceção do ytmusicapi/requests, se houver."""
+    resposta = getattr(erro, "response", None)
+    status = getattr(resposta, "status_code", None)
+    if isinstance(status, int):
+        return status
+    m = re.search(r"HTTP (\d{3})", str(erro))
+    return int(m.group(1)) if m else None
+
+
+def erro_transitorio(erro: Exception) -> bool:
+    """Erros que valem nova tentativa: 429, 5xx, falhas de conexão e timeouts."""
+    status = status_http(erro)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(erro, (ConnectionError, TimeoutError)):
+        return True
+    # requests.ConnectionError/Timeout não herdam das exceções nativas.
+    return type(erro).__name__ in {"ConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout"}
+
+
+def erro_sobrecarga(erro: Exception) -> bool:
+    """O servidor pediu para diminuirmos o ritmo (429/503)."""
+    return status_http(erro) in (429, 503)
+
+
+class LimitadorAdaptativo:
+    """
+    Token bucket com taxa adaptativa (AIMD): a taxa sobe um pouco a cada
+    sucesso e cai pela metade quando o servidor reclama (429/503).
+    Seguro para uso entre threads.
+    """
+
+    def __init__(
+        self,
+        taxa_inicial: float = 2.0,
+        taxa_minima: float = 0.2,
+        taxa_maxima: float = 10.0,
+        rajada: float = 5.0,
+        incremento: float = 0.05,
+        fator_reducao: float = 0.5,
+    ):
+        # A taxa máxima é um limite rígido: se for menor, a mínima desce até ela.
+        self.taxa_minima = min(taxa_minima, taxa_maxima)
+        self.taxa_maxima = taxa_maxima
+        self.taxa = min(max(taxa_inicial, taxa_minima), self.taxa_maxima)
+        self.rajada = rajada
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self._tokens = min(rajada, 1.0)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def para_intervalo(cls, intervalo_minimo: Optional[float]) -> "LimitadorAdaptativo":
+        """
+        Limitador que nunca faz requisições a menos de `intervalo_minimo`
+        segundos uma da outra (sem rajadas acima disso).
+        """
+        if intervalo_minimo and intervalo_minimo > 0:
+            return cls(taxa_maxima=1 / intervalo_minimo, rajada=1.0)
+        return cls()
+
+    def adquirir(self) -> None:
+        """Bloqueia até haver um token disponível."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(
+                    self.rajada, self._tokens + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+    def sucesso(self) -> None:
+        with self._lock:
+            self.taxa = min(self.taxa_maxima, self.taxa + self.incremento)
+
+    def sobrecarga(self) -> None:
+        with self._lock:
+            self.taxa = max(self.taxa_minima, self.taxa * self.fator_reducao)
+            self._tokens = 0
+
+
+def repetir_com_backoff(
+    fn: Callable,
+    limitador: Optional[LimitadorAdaptativo] = None,
+    descricao: str = "requisição",
+    base: float = 1.0,
+    teto: float = 60.0,
+    tempo_max: float = 300.0,
+):
+    """
+    Executa `fn` passando pelo `limitador`, repetindo erros transitórios com
+    backoff exponencial com jitter ("full jitter") até `tempo_max` segundos.
+    Erros não transitórios (ou o estouro do prazo) são propagados.
+    """
+    inicio = time.monotonic()
+    tentativa = 0
+    while True:
+        if limitador is not None:
+            limitador.adquirir()
+        try:
+            ret = fn()
+        except Exception as e:
+            if not erro_transitorio(e):
+                raise
+            if limitador is not None and erro_sobrecarga(e):
+                limitador.sobrecarga()
+            espera = random.uniform(0, min(teto, base * 2 ** tentativa))
+            if time.monotonic() - inicio + espera > tempo_max:
+                raise
+            print(
+                f"ERRO: (Tentando novamente {descricao}) {e} em {espera:.1f} s")
+            time.sleep(espera)
+            tentativa += 1
+            continue
+        if limitador is not None:
+            limitador.sucesso()
+        return ret
+
+
+class CircuitoAberto(Exception):
+    """A API falhou vezes demais seguidas; a execução deve ser interrompida."""
+
+
+class DisjuntorCircuito:
+    """
+    Disjuntor (circuit breaker) para a API: após `limite_falhas` falhas
+    seguidas, as chamadas ficam suspensas por uma pausa que dobra a cada nova
+    abertura. Depois da pausa, uma única falha reabre o circuito; um sucesso o
+    fecha. Passadas `max_aberturas` aberturas seguidas, levanta `CircuitoAberto`.
+    """
+
+    def __init__(
+        self,
+        limite_falhas: int = 5,
+        pausa: float = 30.0,
+        pausa_maxima: float = 600.0,
+        max_aberturas: int = 5,
+    ):
+        self.limite_falhas = limite_falhas
+        self.pausa = pausa
+        self.pausa_maxima = pausa_maxima
+        self.max_aberturas = max_aberturas
+        self._falhas = 0
+        self._aberturas = 0
+        self._fechado_em = 0.0
+        self._lock = threading.Lock()
+
+    def antes_da_chamada(self) -> None:
+        """Espera o fim da pausa (se o circuito estiver aberto)."""
+        with self._lock:
+            if self._aberturas > self.max_aberturas:
+                raise CircuitoAberto(
+                    f"{self._aberturas} aberturas seguidas do circuito; interrompendo.")
+            espera = self._fechado_em - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+
+    def sucesso(self) -> None:
+        with self._lock:
+            self._falhas = 0
+            self._aberturas = 0
+
+    def falha(self) -> None:
+        with self._lock:
+            self._falhas += 1
+            limite = 1 if self._aberturas else self.limite_falhas
+            if self._falhas < limite:
+                return
+            self._falhas = 0
+            self._aberturas += 1
+            pausa = min(self.pausa_maxima, self.pausa *
+                        2 ** (self._aberturas - 1))
+            self._fechado_em = time.monotonic() + pausa
+        print(
+            f"AVISO: Muitas falhas seguidas na API; pausando as chamadas por {pausa:.0f} s.")
+
+
+class YTMusicLimitado:
+    """
+    Envoltório do `YTMusic` que faz toda chamada de método passar pelo
+    limitador de taxa, pelo backoff de `repetir_com_backoff` e pelo disjuntor.
+    """
+
+    def __init__(
+        self,
+        yt,
+        limitador: Optional[LimitadorAdaptativo] = None,
+        tempo_max: float = 300.0,
+        disjuntor: Optional[DisjuntorCircuito] = None,
+    ):
+        self.yt = yt
+        self.limitador = limitador if limitador is not None else LimitadorAdaptativo()
+        self.tempo_max = tempo_max
+        self.disjuntor = disjuntor if disjuntor is not None else DisjuntorCircuito()
+
+    def __getattr__(self, nome: str):
+        atributo = getattr(self.yt, nome)
+        if nome.startswith("_") or not callable(atributo):
+            return atributo
+
+        @functools.wraps(atributo)
+        def chamada(*args, **kwargs):
+            self.disjuntor.antes_da_chamada()
+            try:
+                ret = repetir_com_backoff(
+                    lambda: atributo(*args, **kwargs),
+                    self.limitador,
+                    descricao=nome,
+                    tempo_max=self.tempo_max,
+                )
+            except Exception as e:
+                # Só conta falhas da API (HTTP/conexão), não erros de parsing pontuais.
+                if status_http(e) is not None or erro_transitorio(e):
+                    self.disjuntor.falha()
+                raise
+            self.disjuntor.sucesso()
+            return ret
+
+        return chamada
@@ -4,17 +4,142 @@
 #  Licenciado sob MIT
 #  Origem: https://github.com/caseychu/spotify-backup
 
-import codecs
+import gzip
 import http.client
 import http.server
 import json
+import os
+import queue
+import random
 import re
 import sys
+import threading
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
 import webbrowser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SpotifyAPIError(Exception):
+    """Falha definitiva ao acessar a API do Spotify."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class BackupCheckpoint:
+    """
+    Pontos de controle (JSON Lines) de um backup em andamento: cada página
+    baixada de uma listagem e cada listagem concluída. Com `resume=True`, o
+    arquivo existente é lido e só o que falta é buscado de novo.
+    """
+
+    def __init__(self, filename, resume=False):
+        self.filename = filename
+        self._pages = {}
+        self._totals = {}
+        self._complete = set()
+        self._lock = threading.Lock()
+        if resume and os.path.exists(filename):
+            self._load()
+        self._file = open(filename, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        with open(self.filename, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última linha pode ter ficado pela metade.
+                    continue
+                key = record["key"]
+                if record.get("discard"):
+                    self._forget(key)
+                elif record.get("complete"):
+                    self._complete.add(key)
+                else:
+                    self._pages.setdefault(key, {})[record["offset"]] = record["response"]
+                    self._totals[key] = record["response"].get("total")
+        print(
+            f"Retomando backup de '{self.filename}': {len(self._pages)} listagens, "
+            f"{len(self._complete)} concluídas."
+        )
+
+    def _forget(self, key):
+        self._pages.pop(key, None)
+        self._totals.pop(key, None)
+        self._complete.discard(key)
+
+    def _write(self, record):
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def is_complete(self, key):
+        return key in self._complete
+
+    def page(self, key, offset):
+        return self._pages.get(key, {}).get(offset)
+
+    def save_page(self, key, offset, response):
+        self._write({"key": key, "offset": offset, "response": response})
+
+    def check_total(self, key, total):
+        """Descarta as páginas de `key` se a listagem mudou de tamanho."""
+        if key in self._totals and self._totals[key] != total:
+            self._forget(key)
+            self._write({"key": key, "discard": True})
+
+    def mark_complete(self, key):
+        self._write({"key": key, "complete": True})
+
+    def items(self, key):
+        """Itens de uma listagem concluída (liberados da memória em seguida)."""
+        pages = self._pages.pop(key, {})
+        self._complete.discard(key)
+        items = []
+        for offset in sorted(pages):
+            items += pages[offset]["items"]
+        return items
+
+    def close(self, remove=False):
+        self._file.close()
+        if remove:
+            os.remove(self.filename)
+
+
+class _ConnectionPool:
+    """Conexões HTTPS persistentes (keep-alive) para um host, reaproveitadas entre threads."""
+
+    def __init__(self, host, size, timeout=30):
+        self.host = host
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self):
+        """Retorna (conexão, reaproveitada): uma ociosa do pool ou uma nova."""
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self.new(), False
+
+    def new(self):
+        return http.client.HTTPSConnection(self.host, timeout=self.timeout)
+
+    def release(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
 
 
 class SpotifyAPI:
@@ -22,33 +147,143 @@ class SpotifyAPI:
 
     BASE_URL = "https://api.spotify.com/v1/"
 
-    def __init__(self, auth):
+    def __init__(self, auth, concurrency=8):
         self._auth = auth
-
-    def get(self, url, params={}, tries=3):
-        """Busca um recurso na API do Spotify."""
+        self.concurrency = max(1, concurrency)
+        # Limita as requisições simultâneas, somando todas as threads.
+        self._semaphore = threading.BoundedSemaphore(self.concurrency)
+        self._pool = _ConnectionPool(
+            urllib.parse.urlsplit(self.BASE_URL).netloc, self.concurrency)
+        # Se definido (um `BackupCheckpoint`), `list(…, key=…)` salva e reaproveita páginas.
+        self.checkpoint = None
+        # Após um 429, todas as threads esperam até este instante (monotonic).
+        self._paused_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    def _wait_pause(self):
+        with self._pause_lock:
+            wait = self._paused_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _pause(self, seconds):
+        with self._pause_lock:
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + seconds)
+
+    def get(self, url, params={}, tries=5):
+        """
+        Busca um recurso na API do Spotify. Respeita o `Retry-After` de
+        respostas 429 e repete erros de rede/5xx com backoff exponencial;
+        outros erros HTTP (ou esgotar as tentativas) levantam `SpotifyAPIError`.
+        """
         url = self._construct_url(url, params)
-        for _ in range(tries):
+        failures = 0
+        while True:
+            self._wait_pause()
             try:
-                req = self._create_request(url)
-                return self._read_response(req)
-            except Exception as err:
-                print(f"Erro ao buscar URL {url}: {err}")
-                time.sleep(2)
-        sys.exit("Falha ao obter dados da API do Spotify após várias tentativas.")
-
-    def list(self, url, params={}):
-        """Paginação: agrega e retorna todos os itens."""
+                with self._semaphore:
+                    status, headers, body = self._request(url)
+            except (OSError, http.client.HTTPException) as err:
+                status, headers, body = None, {}, str(err)
+
+            if status == 200:
+                return json.loads(body)
+            if status == 429:
+                # Limite de taxa: não conta como falha; todas as threads esperam o pedido.
+                try:
+                    wait = float(headers.get("retry-after") or 1)
+                except ValueError:
+                    wait = 5.0
+                print(f"Limite de requisições do Spotify; aguardando {wait:.0f} s…")
+                self._pause(wait)
+                continue
+            if status is not None and status < 500:
+                raise SpotifyAPIError(
+                    f"Erro HTTP {status} ao buscar {url}: {body[:200]}", status)
+
+            failures += 1
+            print(f"Erro ao buscar URL {url}: {status or body}")
+            if failures >= tries:
+                raise SpotifyAPIError(
+                    "Falha ao obter dados da API do Spotify após várias tentativas.",
+                    status,
+                )
+            time.sleep(random.uniform(0, min(30, 2 ** failures)))
+
+    def list(self, url, params={}, key=None):
+        """
+        Paginação: agrega e retorna todos os itens. O `total` da primeira
+        página dá os offsets restantes, que são buscados em paralelo.
+
+        Com `key` e um `checkpoint`, cada página é salva ao chegar; numa nova
+        execução só as páginas que faltam são buscadas (e listagens já
+        concluídas nem são consultadas). A primeira página é sempre buscada,
+        a menos que a listagem esteja concluída: se o `total` mudou, as
+        páginas salvas são descartadas.
+        """
+        checkpoint = self.checkpoint if key is not None else None
+        if checkpoint is not None and checkpoint.is_complete(key):
+            return checkpoint.items(key)
+
         response = self.get(url, params)
         items = response["items"]
 
-        while response["next"]:
-            response = self.get(response["next"])
-            items += response["items"]
+        total = response.get("total")
+        limit = response.get("limit") or len(items)
+        first_offset = response.get("offset", 0)
+        if checkpoint is not None:
+            checkpoint.check_total(key, total)
+            checkpoint.save_page(key, first_offset, response)
+        if not response["next"]:
+            if checkpoint is not None:
+                checkpoint.mark_complete(key)
+            return items
+        if total is None or not limit:
+            # Sem `total`, só resta seguir os links `next` um a um.
+            while response["next"]:
+                response = self.get(response["next"])
+                items += response["items"]
+            return items
+
+        def fetch_page(offset):
+            if checkpoint is not None:
+                page = checkpoint.page(key, offset)
+                if page is not None:
+                    return page
+            page = self.get(url, {**params, "offset": offset, "limit": limit})
+            if checkpoint is not None:
+                checkpoint.save_page(key, offset, page)
+            return page
+
+        offsets = range(first_offset + limit, total, limit)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for page in executor.map(fetch_page, offsets):
+                items += page["items"]
+        if checkpoint is not None:
+            checkpoint.items(key)  # libera as páginas já incorporadas
+            checkpoint.mark_complete(key)
         return items
 
+    def list_until(self, url, params, known):
+        """
+        Pagina em ordem (mais recentes primeiro) até achar um item cuja chave
+        (`added_at`, id da faixa/álbum) esteja em `known`. Retorna os itens
+        novos, o primeiro item conhecido (ou None) e o `total` informado.
+        """
+        response = self.get(url, params)
+        items = []
+        while True:
+            for item in response["items"]:
+                if _item_key(item) in known:
+                    return items, item, response.get("total")
+                items.append(item)
+            if not response["next"]:
+                return items, None, response.get("total")
+            response = self.get(response["next"])
+
     @staticmethod
-    def authorize(client_id, scope):
+    def authorize(client_id, scope, concurrency=8):
         """Abre o navegador para autorização e retorna a instância autenticada."""
         redirect_uri = f"http://127.0.0.1:{SpotifyAPI._SERVER_PORT}/redirect"
         url = SpotifyAPI._construct_auth_url(client_id, scope, redirect_uri)
@@ -62,7 +297,7 @@ class SpotifyAPI:
             while True:
                 server.handle_request()
         except SpotifyAPI._Authorization as auth:
-            return SpotifyAPI(auth.access_token)
+            return SpotifyAPI(auth.access_token, concurrency)
 
     @staticmethod
     def _construct_auth_url(client_id, scope, redirect_uri):
@@ -84,17 +319,46 @@ class SpotifyAPI:
                 urllib.parse.urlencode(params)
         return url
 
-    def _create_request(self, url):
-        """Cria uma requisição autenticada."""
-        req = urllib.request.Request(url)
-        req.add_header("Authorization", f"Bearer {self._auth}")
-        return req
-
-    def _read_response(self, req):
-        """Lê e decodifica a resposta JSON."""
-        with urllib.request.urlopen(req) as res:
-            reader = codecs.getreader("utf-8")
-            return json.load(reader(res))
+    def _request(self, url):
+        """
+        Faz um GET autenticado numa conexão do pool, pedindo gzip.
+        Retorna (status, cabeçalhos em minúsculas, corpo decodificado).
+        """
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path + ("?" + parts.query if parts.query else "")
+        request_headers = {
+            "Authorization": f"Bearer {self._auth}",
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+        }
+        conn, reused = self._pool.acquire()
+        try:
+            try:
+                conn.request("GET", path, headers=request_headers)
+                res = conn.getresponse()
+            except ConnectionError:
+                # Uma conexão ociosa pode ter sido fechada pelo servidor
+                # (RemoteDisconnected/BrokenPipe antes de qualquer resposta):
+                # repete uma vez, já, numa conexão nova, sem contar como falha.
+                if not reused:
+                    raise
+                conn.close()
+                conn = self._pool.new()
+                conn.request("GET", path, headers=request_headers)
+                res = conn.getresponse()
+            body = res.read()
+        except Exception:
+            # Conexão em estado desconhecido: descarta em vez de devolver ao pool.
+            conn.close()
+            raise
+        headers = {key.lower(): value for key, value in res.getheaders()}
+        if headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        if res.will_close:
+            conn.close()
+        else:
+            self._pool.release(conn)
+        return res.status, headers, body.decode("utf-8")
 
     _SERVER_PORT = 43019
 
@@ -141,73 +405,398 @@ class SpotifyAPI:
             self.access_token = access_token
 
 
-def fetch_user_data(spotify, dump):
-    """Busca playlists e músicas curtidas conforme o parâmetro `dump`."""
+# Campos pedidos à API nas faixas de playlists (parâmetro `fields`): só o que
+# a migração, o formato txt e o backup incremental usam, mais a paginação.
+PLAYLIST_TRACK_FIELDS = (
+    "items(added_at,track(id,name,uri,duration_ms,external_ids(isrc),"
+    "artists(name),album(name,release_date))),"
+    "total,limit,offset,next"
+)
+
+
+def _slim_artists(artists):
+    return [{"name": artist.get("name")} for artist in artists or []]
+
+
+def slim_track_item(item):
+    """Reduz um item de faixa do Spotify aos campos usados pelo projeto."""
+    track = item.get("track")
+    if not track:
+        return {"added_at": item.get("added_at"), "track": None}
+    album = track.get("album") or {}
+    return {
+        "added_at": item.get("added_at"),
+        "track": {
+            "id": track.get("id"),
+            "name": track.get("name"),
+            "uri": track.get("uri"),
+            "duration_ms": track.get("duration_ms"),
+            "external_ids": {"isrc": (track.get("external_ids") or {}).get("isrc")},
+            "artists": _slim_artists(track.get("artists")),
+            "album": {
+                "name": album.get("name"),
+                "release_date": album.get("release_date"),
+            },
+        },
+    }
+
+
+def slim_album_item(item):
+    """Reduz um item de álbum curtido aos campos usados pelo projeto."""
+    album = item.get("album") or {}
+    return {
+        "added_at": item.get("added_at"),
+        "album": {
+            "id": album.get("id"),
+            "name": album.get("name"),
+            "artists": _slim_artists(album.get("artists")),
+            "tracks": {
+                "items": [
+                    {"name": track.get("name"),
+                     "duration_ms": track.get("duration_ms"),
+                     "artists": _slim_artists(track.get("artists"))}
+                    for track in (album.get("tracks") or {}).get("items", [])
+                ]
+            },
+        },
+    }
+
+
+def _item_key(item):
+    """Chave de um item de biblioteca: (added_at, id da faixa ou do álbum)."""
+    obj = item.get("track") or item.get("album") or {}
+    return item.get("added_at"), obj.get("id")
+
+
+def _list_incremental(spotify, url, params, previous):
+    """
+    Lista itens ordenados por `added_at` (curtidas, álbuns) reaproveitando
+    `previous`: só as páginas com itens novos são buscadas. Se o total não
+    bater (algo foi removido fora do topo), recarrega tudo.
+    """
+    if not previous:
+        return spotify.list(url, params, key=url)
+    new_items, first_known, total = spotify.list_until(
+        url, params, {_item_key(item) for item in previous}
+    )
+    if first_known is None:
+        return new_items
+    keys = [_item_key(item) for item in previous]
+    items = new_items + previous[keys.index(_item_key(first_known)):]
+    if total is not None and len(items) != total:
+        print(f"Itens de {url} mudaram além dos mais recentes; recarregando todos…")
+        return spotify.list(url, params)
+    print(f"{len(new_items)} itens novos em {url}.")
+    return items
+
+
+def _library():
+    """
+    Módulo `biblioteca`, tanto com este arquivo importado do pacote quanto
+    rodado como script (`python spotify_backup.py …`, sem pacote pai).
+    """
+    try:
+        from . import biblioteca
+    except ImportError:
+        import biblioteca
+    return biblioteca
+
+
+def load_previous(file):
+    """
+    Lê um backup anterior (JSON ou SQLite), para `fetch_user_data(previous=…)`.
+    Retorna None se o arquivo não existir ou não puder ser lido.
+    """
+    try:
+        with open(file, "rb") as f:
+            sqlite = f.read(16) == b"SQLite format 3\x00"
+        if sqlite:
+            library = _library().BibliotecaSQLite(file)
+            try:
+                return {
+                    "albums": list(library.albuns),
+                    "playlists": [
+                        {**meta, "tracks": list(items)}
+                        for meta, items in library.iterar_playlists()
+                    ],
+                }
+            finally:
+                library.fechar()
+        with open(file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as err:
+        print(f"Backup anterior '{file}' indisponível ({err}); fazendo backup completo.")
+        return None
+
+
+def fetch_user_data(spotify, dump, previous=None, slim=False, writer=None):
+    """
+    Busca playlists e músicas curtidas conforme o parâmetro `dump`.
+
+    Com `previous` (dados de um backup JSON anterior), só são baixadas as
+    faixas de playlists cujo `snapshot_id` mudou, e as curtidas/álbuns
+    param de paginar ao encontrar itens já conhecidos. Com `slim`, faixas,
+    álbuns e playlists guardam só os campos usados pela migração.
+
+    Com `writer` (um `BackupWriter`), cada playlist é gravada assim que
+    baixada, na ordem original, e não é mantida em memória; nesse caso as
+    listas retornadas ficam vazias.
+    """
     playlists = []
     liked_albums = []
+    previous_liked = []
+    previous_albums = []
+    previous_by_id = {}
+    if previous:
+        previous_albums = previous.get("albums", [])
+        for playlist in previous.get("playlists", []):
+            if playlist.get("name") == "Liked Songs" and playlist.get("id") is None:
+                previous_liked = playlist.get("tracks", [])
+            elif playlist.get("id") is not None:
+                previous_by_id[playlist["id"]] = playlist
+
+    def emit(playlist):
+        if writer is None:
+            playlists.append(playlist)
+        else:
+            writer.write_playlist(playlist)
 
     if "liked" in dump:
         print("Carregando álbuns e músicas curtidas…")
-        liked_tracks = spotify.list("me/tracks", {"limit": 50})
-        liked_albums = spotify.list("me/albums", {"limit": 50})
-        playlists.append({"name": "Liked Songs", "tracks": liked_tracks})
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            tracks_future = executor.submit(
+                _list_incremental, spotify, "me/tracks", {"limit": 50}, previous_liked)
+            albums_future = executor.submit(
+                _list_incremental, spotify, "me/albums", {"limit": 50}, previous_albums)
+            liked_tracks = tracks_future.result()
+            liked_albums = albums_future.result()
+        if slim:
+            liked_tracks = [slim_track_item(item) for item in liked_tracks]
+            liked_albums = [slim_album_item(item) for item in liked_albums]
+        if writer is not None:
+            writer.write_albums(liked_albums)
+            liked_albums = []
+        emit({"name": "Liked Songs", "tracks": liked_tracks})
+        del liked_tracks
 
     if "playlists" in dump:
         print("Carregando playlists…")
         playlist_data = spotify.list("me/playlists", {"limit": 50})
-        for playlist in playlist_data:
-            print(f"Carregando playlist: {playlist['name']}")
-            playlist["tracks"] = spotify.list(
-                playlist["tracks"]["href"], {"limit": 100}
-            )
-        playlists.extend(playlist_data)
+
+        def load_tracks(playlist):
+            old = previous_by_id.get(playlist.get("id"))
+            if (
+                old is not None
+                and playlist.get("snapshot_id")
+                and old.get("snapshot_id") == playlist["snapshot_id"]
+                and isinstance(old.get("tracks"), list)
+            ):
+                print(f"Playlist sem alterações: {playlist['name']}")
+                tracks = old["tracks"]
+            else:
+                print(f"Carregando playlist: {playlist['name']}")
+                tracks = spotify.list(
+                    playlist["tracks"]["href"],
+                    {"limit": 100, "fields": PLAYLIST_TRACK_FIELDS},
+                    # Com o snapshot na chave, páginas de outra versão da playlist não se misturam.
+                    key=(f"playlist:{playlist['id']}:{playlist['snapshot_id']}"
+                         if playlist.get("snapshot_id") else None),
+                )
+            if slim:
+                playlist = {
+                    key: playlist.get(key) for key in ("id", "name", "snapshot_id")}
+                tracks = [slim_track_item(item) for item in tracks]
+            return {**playlist, "tracks": tracks}
+
+        # Janela deslizante: no máximo 2x`concurrency` playlists baixadas e
+        # ainda não gravadas, mesmo que alguma demore mais que as seguintes.
+        window = 2 * spotify.concurrency
+        with ThreadPoolExecutor(max_workers=spotify.concurrency) as executor:
+            pending = deque()
+            for playlist in playlist_data:
+                pending.append(executor.submit(load_tracks, playlist))
+                if len(pending) >= window:
+                    emit(pending.popleft().result())
+            while pending:
+                emit(pending.popleft().result())
 
     return playlists, liked_albums
 
 
+class BackupWriter:
+    """
+    Grava o backup aos poucos em `<file>.parcial`, renomeado para `file` só
+    ao final. Se o backup falhar, o arquivo parcial é fechado (em JSON,
+    continua válido) e mantido com o que já foi baixado.
+
+    No formato json, o documento tem o mesmo formato de sempre
+    (`{"albums": [...], "playlists": [...]}`); os álbuns vêm primeiro porque
+    são baixados antes das playlists. O formato sqlite gera o banco
+    normalizado de `biblioteca.GravadorSQLite`.
+    """
+
+    def __init__(self, file, format="json"):
+        self.file = file
+        self.format = format
+        self.partial = file + ".parcial"
+        if format == "sqlite":
+            self._f = None
+            self._db = _library().GravadorSQLite(self.partial)
+        else:
+            self._f = open(self.partial, "w", encoding="utf-8")
+        self._started = False
+        self._count = 0
+
+    def write_albums(self, liked_albums):
+        """Grava os álbuns curtidos; deve vir antes de qualquer playlist."""
+        if self._started:
+            raise ValueError("Os álbuns devem ser gravados antes das playlists.")
+        self._started = True
+        if self.format == "json":
+            self._f.write('{"albums": ')
+            json.dump(liked_albums, self._f)
+            self._f.write(', "playlists": [')
+        elif self.format == "sqlite":
+            self._db.gravar_albuns(liked_albums)
+
+    def write_playlist(self, playlist):
+        if not self._started:
+            self.write_albums([])
+        if self.format == "json":
+            if self._count:
+                self._f.write(", ")
+            json.dump(playlist, self._f)
+        elif self.format == "sqlite":
+            self._db.gravar_playlist(playlist)
+        else:
+            self._write_txt(playlist)
+        self._count += 1
+        if self._f is not None:
+            self._f.flush()
+
+    def _write_txt(self, playlist):
+        f = self._f
+        f.write(playlist["name"] + "\r\n")
+        for track in playlist["tracks"]:
+            if track["track"]:
+                f.write(
+                    "{name}\t{artists}\t{album}\t{uri}\t{release_date}\r\n".format(
+                        uri=track["track"]["uri"],
+                        name=track["track"]["name"],
+                        artists=", ".join(
+                            [
+                                artist["name"]
+                                for artist in track["track"]["artists"]
+                            ]
+                        ),
+                        album=track["track"]["album"]["name"],
+                        release_date=track["track"]["album"]["release_date"],
+                    )
+                )
+        f.write("\r\n")
+
+    def _finish(self):
+        if not self._started:
+            self.write_albums([])
+        if self.format == "json":
+            self._f.write("]}")
+        if self.format == "sqlite":
+            self._db.fechar()
+        else:
+            self._f.close()
+
+    def close(self):
+        """Conclui o documento e o move para o nome final."""
+        self._finish()
+        os.replace(self.partial, self.file)
+
+    def abort(self):
+        """Conclui o documento parcial, mantendo-o em `<file>.parcial`."""
+        self._finish()
+        print(f"Backup incompleto: {self._count} playlists salvas em {self.partial}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
 def write_to_file(file, format, playlists, liked_albums):
     """Grava os dados coletados no arquivo especificado."""
     print(f"Gravando em {file}…")
-    with open(file, "w", encoding="utf-8") as f:
-        if format == "json":
-            json.dump({"playlists": playlists, "albums": liked_albums}, f)
-        else:
-            for playlist in playlists:
-                f.write(playlist["name"] + "\r\n")
-                for track in playlist["tracks"]:
-                    if track["track"]:
-                        f.write(
-                            "{name}\t{artists}\t{album}\t{uri}\t{release_date}\r\n".format(
-                                uri=track["track"]["uri"],
-                                name=track["track"]["name"],
-                                artists=", ".join(
-                                    [
-                                        artist["name"]
-                                        for artist in track["track"]["artists"]
-                                    ]
-                                ),
-                                album=track["track"]["album"]["name"],
-                                release_date=track["track"]["album"]["release_date"],
-                            )
-                        )
-                f.write("\r\n")
-
-
-def main(dump="playlists,liked", format="json", file="playlists.json", token=""):
+    with BackupWriter(file, format) as writer:
+        writer.write_albums(liked_albums)
+        for playlist in playlists:
+            writer.write_playlist(playlist)
+
+
+def main(dump="playlists,liked", format="json", file="playlists.json", token="",
+         concurrency=8, incremental=False, slim=False, resume=False):
+    """
+    Faz o backup; `concurrency` limita as requisições simultâneas à API.
+    Com `incremental`, reaproveita o que não mudou desde o backup JSON em `file`;
+    com `slim`, grava só os campos usados pela migração.
+
+    O progresso fica em `<file>.checkpoint.jsonl` até o fim do backup; se ele
+    falhar, rodar de novo com `resume` busca só as páginas que faltam.
+    """
     print("Iniciando backup…")
+    previous = load_previous(file) if incremental and format != "txt" else None
     spotify = (
-        SpotifyAPI(token)
+        SpotifyAPI(token, concurrency)
         if token
         else SpotifyAPI.authorize(
             client_id="5c098bcc800e45d49e476265bc9b6934",
             scope="playlist-read-private playlist-read-collaborative user-library-read",
+            concurrency=concurrency,
         )
     )
 
-    playlists, liked_albums = fetch_user_data(spotify, dump)
-    write_to_file(file, format, playlists, liked_albums)
+    checkpoint = BackupCheckpoint(file + ".checkpoint.jsonl", resume)
+    spotify.checkpoint = checkpoint
+
+    print(f"Gravando em {file} à medida que as playlists chegam…")
+    try:
+        with BackupWriter(file, format) as writer:
+            fetch_user_data(spotify, dump, previous, slim, writer)
+    except BaseException as err:
+        checkpoint.close()
+        print(
+            f"Progresso salvo em {checkpoint.filename}; rode novamente com "
+            "--resume para continuar de onde parou."
+        )
+        if isinstance(err, SpotifyAPIError):
+            sys.exit(f"ERRO: {err}")
+        raise
+    checkpoint.close(remove=True)
     print(f"Backup concluído! Dados salvos em {file}")
 
 
 if __name__ == "__main__":
-    main()
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Backup das playlists do Spotify.")
+    parser.add_argument("file", nargs="?", default="playlists.json",
+                        help="Arquivo de saída (padrão: playlists.json).")
+    parser.add_argument("--dump", default="playlists,liked",
+                        help="O que salvar: playlists, liked ou ambos (padrão: playlists,liked).")
+    parser.add_argument("--format", default="json", choices=["json", "txt", "sqlite"],
+                        help="Formato do arquivo (padrão: json; sqlite grava um banco "
+                             "normalizado, lido direto pelos comandos de cópia).")
+    parser.add_argument("--token", default="",
+                        help="Token OAuth do Spotify (se omitido, abre o navegador).")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Máximo de requisições simultâneas à API (padrão: 8).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reaproveitar o backup existente em `file`, baixando só o que mudou.")
+    parser.add_argument("--slim", action="store_true",
+                        help="Gravar só os campos usados pela migração (arquivo bem menor).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continuar um backup interrompido a partir de `file`.checkpoint.jsonl.")
+    args = parser.parse_args()
+    main(args.dump, args.format, args.file, args.token,
+         args.concurrency, args.incremental, args.slim, args.resume)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from spotify2ytmusic.correspondencia import (
+    LIMITE_PADRAO,
+    chaves_faixa,
+    melhor_correspondencia,
+    pontuar,
+)
+
+
+def _video(title, artist):
+    """Resultado de busca de vídeos: sem álbum, como os do YTMusic."""
+    return {
+        "title": title,
+        "videoId": "v-" + title,
+        "artists": [{"name": artist}],
+        "resultType": "video",
+    }
+
+
+@pytest.mark.parametrize(
+    "title, artist, outro_artista",
+    [
+        ("Hello", "Adele", "Lionel Richie"),
+        ("Yesterday", "The Beatles", "Leona Lewis"),
+        ("Sorry", "Justin Bieber", "Beyoncé"),
+    ],
+)
+def test_mesmo_titulo_de_outro_artista_nao_corresponde(title, artist, outro_artista):
+    chaves = chaves_faixa(title, artist)
+    candidato = _video(title, outro_artista)
+    assert pontuar(chaves, candidato) < LIMITE_PADRAO
+    assert melhor_correspondencia(chaves, [candidato])[0] is None
+
+
+@pytest.mark.parametrize(
+    "title, artist, candidato",
+    [
+        ("Hello", "Adele", _video("Adele - Hello (Official Music Video)", "AdeleVEVO")),
+        ("Yesterday", "The Beatles", _video("Yesterday", "Beatles")),
+        ("So What", "P!nk", _video("So What", "Pink")),
+    ],
+)
+def test_variacoes_do_mesmo_artista_correspondem(title, artist, candidato):
+    assert pontuar(chaves_faixa(title, artist), candidato) >= LIMITE_PADRAO
+
+
+def test_artista_certo_vence_o_errado():
+    chaves = chaves_faixa("Hello", "Adele")
+    errado = _video("Hello", "Lionel Richie")
+    certo = _video("Hello", "Adele")
+    assert melhor_correspondencia(chaves, [errado, certo])[0] is certo